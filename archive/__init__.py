@@ -0,0 +1,4 @@
+"""
+The scripts that scraped and cleaned the datasets. Run them from the repository root as modules, e.g.
+python -m archive.webscraper
+"""
@@ -1,5 +1,6 @@
 """
 Code that was used to clean our datasets and create active_players.json
+Superseded by cleaning.py, which produces the same connections with a streaming hash join.
 ### LIST OF TASKS ###
 # Number 1 - Get a list of all active players
 #          - Extract all the names and choose where they get saved (do we want to filter players.json?) -> logical
@@ -0,0 +1,185 @@
+"""
+Concurrent, rate-limited fetching for the webscraper. Requests share one session (and its pooled connections),
+are spread over a thread pool, and are paced by a token bucket, so the time spent waiting on one response counts
+towards the wait before the next request instead of being added to it. Failed requests are retried with
+exponential backoff. Given a ResponseCache, fetch_text only requests pages that are not cached or are stale.
+
+basketball-reference.com allows 20 requests a minute, so that is the default rate.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .response_cache import ResponseCache
+
+REQUESTS_PER_MINUTE = 20
+
+# Responses worth retrying: rate limiting and server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    """
+    Hands out tokens at rate per second, holding at most capacity of them at once. A caller that finds the bucket
+    empty reserves the next token and sleeps until it is due, so waiting callers are served in turn.
+    """
+    rate: float
+    capacity: float
+    tokens: float  # negative when tokens have been reserved ahead of time
+    updated: float
+    lock: threading.Lock
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available, and return how long was spent sleeping."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RetryPolicy:
+    """
+    How often a failed request is retried: up to max_retries attempts in total, waiting retry_delay seconds
+    after the first failure and backoff times longer after each one after that. A 429 response's Retry-After
+    header is used instead when it asks for a longer wait.
+    """
+    max_retries: int
+    retry_delay: float
+    backoff: float
+
+    def __init__(self, max_retries: int = 3, retry_delay: float = 5, backoff: float = 1.5) -> None:
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.backoff = backoff
+
+    def get_delay(self, attempt: int, error: Exception) -> float:
+        """Return how many seconds to wait before retrying after the given (zero-based) attempt failed."""
+        delay = self.retry_delay * self.backoff ** attempt
+        response = getattr(error, "response", None)
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+        return delay
+
+
+def is_retryable(error: requests.RequestException) -> bool:
+    """Return whether the request that raised error could succeed if it were sent again."""
+    response = getattr(error, "response", None)
+    return response is None or response.status_code in RETRY_STATUSES
+
+
+class FetchEngine:
+    """
+    Fetches URLs over a shared session from a pool of max_workers threads, sending at most requests_per_minute
+    requests and keeping at most max_per_host requests in flight to any one host. Pages fetched with
+    fetch_text are kept in cache, if one is given.
+    """
+    session: requests.Session
+    bucket: TokenBucket
+    retry: RetryPolicy
+    timeout: float
+    cache: Optional[ResponseCache]
+    max_per_host: int
+    host_limits: dict[str, threading.Semaphore]
+    host_limits_lock: threading.Lock
+    executor: ThreadPoolExecutor
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE, max_workers: int = 4,
+                 max_per_host: int = 2, retry: Optional[RetryPolicy] = None, timeout: float = 10,
+                 cache: Optional[ResponseCache] = None) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.bucket = TokenBucket(requests_per_minute / 60)
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.timeout = timeout
+        self.cache = cache
+        self.max_per_host = max_per_host
+        self.host_limits = {}
+        self.host_limits_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self) -> "FetchEngine":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Wait for the requests in flight, then close the thread pool and the session's connections."""
+        self.executor.shutdown()
+        self.session.close()
+
+    def get_host_limit(self, url: str) -> threading.Semaphore:
+        """Return the semaphore limiting the requests in flight to the host of url."""
+        host = urlsplit(url).netloc
+        with self.host_limits_lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.Semaphore(self.max_per_host)
+            return self.host_limits[host]
+
+    def get(self, url: str, retry: Optional[RetryPolicy] = None, label: Optional[str] = None,
+            headers: Optional[dict[str, str]] = None) -> requests.Response:
+        """
+        Return the response to a GET request for url with the given extra headers, retrying it as retry (or the
+        engine's policy) allows. Raise the last requests.RequestException if every attempt fails. label names the
+        request in the messages printed on failure, and defaults to the URL.
+        """
+        retry = retry if retry is not None else self.retry
+        label = label if label is not None else url
+        host_limit = self.get_host_limit(url)
+        attempt = 0
+        while True:
+            try:
+                with host_limit:
+                    self.bucket.acquire()
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                response.raise_for_status()  # raise an exception for 4XX/5XX responses
+                return response
+            except requests.RequestException as e:
+                if attempt >= retry.max_retries - 1 or not is_retryable(e):
+                    print(f"Failed to fetch data for {label} after {attempt + 1} attempts: {str(e)}")
+                    raise
+                delay = retry.get_delay(attempt, e)
+                print(f"Error fetching data for {label}: {str(e)}. Retrying in {delay:g} seconds... "
+                      f"(Attempt {attempt + 1}/{retry.max_retries})")
+                time.sleep(delay)
+                attempt += 1
+
+    def fetch_text(self, url: str, retry: Optional[RetryPolicy] = None, label: Optional[str] = None) -> str:
+        """
+        Return the text of the page at url, from the cache where possible. Raise requests.RequestException if it
+        cannot be fetched.
+        """
+        if self.cache is None:
+            return self.get(url, retry, label).text
+        return self.cache.get(url, lambda headers: self.get(url, retry, label, headers))
+
+    def map(self, function: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """
+        Call function on every item from the thread pool, and yield the results in the order of items. function
+        is expected to fetch through this engine.
+        """
+        return self.executor.map(function, items)
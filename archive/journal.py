@@ -0,0 +1,115 @@
+"""
+An append-only journal of scraped players, so a long scrape can be stopped and resumed without losing work.
+Each player is appended to a JSON Lines file as one [key, value, failed] line the moment it is scraped, and the
+file is flushed to disk before the next one, so a checkpoint costs the same however many players came before it.
+When the journal is opened again, the players already in it are skipped. A line cut short by a crash is dropped.
+The finished dataset is written from the journal in a single compaction pass.
+"""
+import json
+import os
+import tempfile
+from typing import BinaryIO, Iterable, Optional
+
+
+class ScrapeJournal:
+    """
+    The journal stored at path. Only the offset of each key's latest line is kept in memory; values are read
+    back from the file when they are needed. If sync is True, every line is fsynced as well as flushed, so it
+    survives a power failure and not just the scraper crashing.
+    """
+    path: str
+    sync: bool
+    offsets: dict[str, int]  # the byte offset of the latest line of each key, in the order keys were first added
+    failed: set[str]  # keys whose latest line was recorded as a failed scrape
+    dropped_offset: Optional[int]  # where an incomplete last line was cut off when the journal was opened, if any
+    file: BinaryIO  # opened for appending
+
+    def __init__(self, path: str, sync: bool = True) -> None:
+        self.path = path
+        self.sync = sync
+        self.offsets = {}
+        self.failed = set()
+        self.dropped_offset = self.replay()
+        self.file = open(path, "ab")
+
+    def __enter__(self) -> "ScrapeJournal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def close(self) -> None:
+        """Close the journal file."""
+        self.file.close()
+
+    def replay(self) -> Optional[int]:
+        """
+        Index the lines already in the journal. If the last line is incomplete, truncate the file to drop it and
+        return the offset it started at; otherwise return None.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb+") as f:
+            offset = 0
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Incomplete line")
+                    key, _, failed = json.loads(line)
+                except ValueError:
+                    f.truncate(offset)
+                    return offset
+                self.index(key, failed, offset)
+                offset += len(line)
+        return None
+
+    def index(self, key: str, failed: bool, offset: int) -> None:
+        """Record that the latest line of key is stored at offset, and whether it was a failed scrape."""
+        self.offsets[key] = offset
+        if failed:
+            self.failed.add(key)
+        else:
+            self.failed.discard(key)
+
+    def record(self, key: str, value: object, failed: bool = False) -> None:
+        """
+        Append the value of key to the journal, replacing any earlier value of it. failed marks the value as the
+        stand-in left by a scrape that failed, so the key can be scraped again later.
+        """
+        offset = self.file.tell()
+        self.file.write(json.dumps([key, value, failed]).encode("utf-8") + b"\n")
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+        self.index(key, failed, offset)
+
+    def compact(self, output_path: str, keys: Optional[Iterable[str]] = None) -> int:
+        """
+        Write the latest value of every key in the journal (or of the given keys, in their order, skipping those
+        not in the journal) to output_path as one JSON object, and return how many were written. The object is
+        written to a temporary file that then replaces output_path, so a crash never leaves it half written.
+        """
+        keys = self.offsets if keys is None else [key for key in dict.fromkeys(keys) if key in self.offsets]
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=".tmp")
+        count = 0
+        try:
+            with open(self.path, "rb") as f, os.fdopen(file_descriptor, "w", encoding="utf-8") as out:
+                out.write("{")
+                for key in keys:
+                    f.seek(self.offsets[key])
+                    _, value, _ = json.loads(f.readline())
+                    out.write(",\n" if count else "\n")
+                    out.write(f"{json.dumps(key)}: {json.dumps(value)}")
+                    count += 1
+                out.write("\n}\n")
+            os.replace(temporary_path, output_path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        return count
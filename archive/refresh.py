@@ -0,0 +1,153 @@
+"""
+Incremental refresh of the scraped datasets, in place of rerunning every scrape in webscraper.py. Only players
+who can have changed are fetched again: players new to the player index, players whose stored stats are marked
+active or include the current season, and players whose stats failed to scrape before. Their stats and teammate
+and opponent rows are merged into the existing datasets, and only their entries of active_players.json are
+rebuilt, so the requests sent scale with the number of players who changed rather than with every player in
+history. The large files are rewritten a player at a time, and each is replaced atomically once it is complete.
+
+Run from the repository root with: python -m archive.refresh
+"""
+import json
+import os
+import tempfile
+from typing import Callable, Iterable, Optional, TextIO
+
+from cleaning import OUTPUT_FILE, PLAYED_AGAINST_FILE, PLAYED_WITH_FILE, STATS_FILE, join_connections, \
+    write_json_object
+from loading import iter_json_object
+
+from . import webscraper
+
+PLAYERS_FILE = "players.json"
+DATA_DIRECTORY = "data"
+
+
+def needs_refresh(info: object) -> bool:
+    """
+    Return whether a player with the given players_stats.json entry can have changed since it was scraped:
+    their stats failed to scrape (leaving a list), or they were active or played in the current season.
+    """
+    if not isinstance(info, dict):
+        return True
+    return info.get("active", False) or webscraper.CURRENT_SEASON in info.get("seasons", [])
+
+
+def find_players_to_refresh(old_players: dict, new_players: dict, player_stats: dict) -> dict[str, str]:
+    """
+    Return the players of the new player index (mapping player id to name) that are not in the old index,
+    have no stats, or need a refresh.
+    """
+    return {
+        player_id: name for player_id, name in new_players.items()
+        if player_id not in old_players or name not in player_stats or needs_refresh(player_stats[name])
+    }
+
+
+def merge_members(members: Iterable[tuple[str, object, int]], updates: dict,
+                  removals: Iterable[str] = ()) -> Iterable[tuple[str, object]]:
+    """
+    Yield the (key, value) members of a JSON object parsed by iter_json_object, with the values of the keys in
+    updates replaced and the keys in removals left out. Updates to keys that were not in the object are yielded
+    last.
+    """
+    updates, removals = dict(updates), set(removals)
+    for key, value, _ in members:
+        if key in removals:
+            continue
+        yield key, updates.pop(key) if key in updates else value
+    yield from updates.items()
+
+
+def replace_file(path: str, write: Callable[[TextIO], None]) -> None:
+    """
+    Call write on a new temporary file next to path, then rename it over path, so the file at path is only ever
+    the old or the new version. Each call gets its own temporary file, so aborted or concurrent runs cannot
+    collide.
+    """
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as out:
+            write(out)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def rewrite_json_object(path: str, updates: dict, removals: Iterable[str] = ()) -> None:
+    """
+    Apply the updates and removals to the JSON object in the file at path (or to an empty object if there is no
+    such file) a member at a time, replacing the file atomically.
+    """
+    def write(out: TextIO) -> None:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                write_json_object(out, merge_members(iter_json_object(f), updates, removals))
+        else:
+            write_json_object(out, merge_members([], updates, removals))
+
+    replace_file(path, write)
+
+
+def dump_json(path: str, data: dict) -> None:
+    """Write data to path the way webscraper.py does, replacing the file atomically."""
+    replace_file(path, lambda out: json.dump(data, out, indent=4))
+
+
+def refresh(directory: str = DATA_DIRECTORY, new_players: Optional[dict] = None) -> dict[str, int]:
+    """
+    Refresh the datasets in directory, and return how many players were refreshed and how many entries of
+    active_players.json were rebuilt or removed. new_players is the current player index, which is scraped if
+    it is not given.
+    """
+    with open(os.path.join(directory, PLAYERS_FILE), "r", encoding="utf-8") as f:
+        old_players = json.load(f)
+    with open(os.path.join(directory, STATS_FILE), "r", encoding="utf-8") as f:
+        player_stats = json.load(f)
+    if new_players is None:
+        new_players = webscraper.get_all_players()
+
+    refreshed = find_players_to_refresh(old_players, new_players, player_stats)
+    player_ids, names = list(refreshed), list(refreshed.values())
+    print(f"Refreshing {len(refreshed)}/{len(new_players)} players")
+
+    engine = webscraper.get_engine()
+    new_stats = dict(zip(names, engine.map(webscraper.scrape_individual_player, player_ids)))
+    teammates = dict(zip(names, engine.map(lambda p: webscraper.players_played_with(p, "t"), player_ids)))
+    opponents = dict(zip(names, engine.map(lambda p: webscraper.players_played_with(p, "o"), player_ids)))
+
+    # A failed fetch (None) leaves what was scraped before in place. A new player whose stats failed is stored
+    # with an empty list, as the full scrape does, so the next refresh tries them again.
+    teammates = {name: rows for name, rows in teammates.items() if rows is not None}
+    opponents = {name: rows for name, rows in opponents.items() if rows is not None}
+    new_stats = {name: [] if info is None else info for name, info in new_stats.items()
+                 if info is not None or name not in player_stats}
+
+    connections, retired = {}, []
+    for name, info in new_stats.items():
+        if not isinstance(info, dict):
+            continue
+        if not info["active"]:
+            retired.append(name)
+        elif name in teammates and name in opponents:
+            connections[name] = join_connections(teammates[name], opponents[name])
+
+    # The player index is written last, so an interrupted refresh sees the same new players when rerun
+    rewrite_json_object(os.path.join(directory, PLAYED_WITH_FILE), teammates)
+    rewrite_json_object(os.path.join(directory, PLAYED_AGAINST_FILE), opponents)
+    rewrite_json_object(os.path.join(directory, OUTPUT_FILE), connections, retired)
+    player_stats.update(new_stats)
+    dump_json(os.path.join(directory, STATS_FILE), player_stats)
+    dump_json(os.path.join(directory, PLAYERS_FILE), new_players)
+
+    return {"refreshed": len(refreshed), "rebuilt": len(connections), "removed": len(retired)}
+
+
+if __name__ == "__main__":
+    summary = refresh()
+    print(f"Refreshed {summary['refreshed']} players, rebuilt {summary['rebuilt']} entries of {OUTPUT_FILE} and "
+          f"removed {summary['removed']}")
+    cache = webscraper.get_engine().cache
+    if cache is not None:
+        print(f"Page cache: {cache.get_stats()}")
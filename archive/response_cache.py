@@ -0,0 +1,135 @@
+"""
+An on-disk cache of the pages the webscraper downloads. Each page is stored zlib-compressed in a file named by
+the SHA-256 hash of its URL, along with its ETag and Last-Modified headers. A page younger than the cache's time
+to live is served from disk without a request. An older one is revalidated with a conditional request, so only
+pages that changed are downloaded again. With offline set, pages are only ever read from disk, so the datasets
+can be re-parsed without touching the network.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from typing import Callable, Optional
+
+import requests
+
+CACHE_DIRECTORY = "data/cache"
+
+# How long a page is served without being revalidated
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class CacheMissError(requests.RequestException):
+    """Raised when an offline cache does not hold the requested page."""
+
+
+class ResponseCache:
+    """
+    Stores page text by URL under directory. Pages are fresh for ttl seconds after they were last downloaded
+    or revalidated; a ttl of None keeps them fresh forever.
+
+    hits counts pages served from disk without a request, revalidations pages the server confirmed were
+    unchanged, and misses pages that were downloaded.
+    """
+    directory: str
+    ttl: Optional[float]
+    offline: bool
+    hits: int
+    revalidations: int
+    misses: int
+    lock: threading.Lock
+
+    def __init__(self, directory: str = CACHE_DIRECTORY, ttl: Optional[float] = DEFAULT_TTL,
+                 offline: bool = False) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.offline = offline
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def path(self, url: str) -> str:
+        """Return the path of the file url is stored in."""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], key + ".z")
+
+    def load(self, url: str) -> Optional[dict]:
+        """Return the stored entry of url, or None if it is not stored or cannot be read."""
+        try:
+            with open(self.path(url), "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def save(self, entry: dict) -> None:
+        """
+        Store the entry, writing it to a temporary file first and renaming it into place so a crash cannot leave a
+        partly written entry behind.
+        """
+        path = self.path(entry["url"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as f:
+                f.write(zlib.compress(json.dumps(entry).encode("utf-8")))
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def is_fresh(self, entry: dict) -> bool:
+        """Return whether entry can be served without revalidating it."""
+        return self.offline or self.ttl is None or time.time() - entry["stored_at"] < self.ttl
+
+    def count(self, counter: str) -> None:
+        """Add one to the named counter."""
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, url: str, fetch: Callable[[dict[str, str]], requests.Response]) -> str:
+        """
+        Return the text of the page at url, from disk if it is fresh, and otherwise by calling fetch with the
+        headers of a conditional request for it and storing the response.
+        """
+        entry = self.load(url)
+        if entry is not None and self.is_fresh(entry):
+            self.count("hits")
+            return entry["text"]
+        if self.offline:
+            raise CacheMissError(f"{url} is not cached")
+
+        headers = {}
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = fetch(headers)
+        if response.status_code == 304 and entry is not None:
+            self.count("revalidations")
+            # The server may send new validators along with the 304
+            if response.headers.get("ETag"):
+                entry["etag"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"):
+                entry["last_modified"] = response.headers["Last-Modified"]
+        else:
+            self.count("misses")
+            entry = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "text": response.text,
+            }
+        entry["stored_at"] = time.time()
+        self.save(entry)
+        return entry["text"]
+
+    def get_stats(self) -> dict[str, int]:
+        """Return the hit, revalidation and miss counts."""
+        with self.lock:
+            return {"hits": self.hits, "revalidations": self.revalidations, "misses": self.misses}
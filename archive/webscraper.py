@@ -1,19 +1,48 @@
 """
 Webscraper for Project 2 of CSC111
 Author: Mark Peng
+
+Run from the repository root with: python -m archive.webscraper
 """
 
 
-import time
 import json
 import csv
-from typing import Any
+import os
+from functools import lru_cache
+from typing import Any, Callable, Optional
 
 from bs4 import BeautifulSoup
 import requests
 
+from .fetching import FetchEngine, RetryPolicy
+from .journal import ScrapeJournal
+from .response_cache import CACHE_DIRECTORY, ResponseCache
+
+
+# Every URL is built from SITE when it is requested, so the scraper can be pointed at a local stand-in server
+SITE = "https://www.basketball-reference.com"
+
+# Players who played in this season are marked active
+CURRENT_SEASON = "2024-25"
+
+# Where each scrape records players as they are done, so it can be resumed
+STATS_JOURNAL = "data/players_stats.jsonl"
+PLAYED_WITH_JOURNAL = "data/players_played_with.jsonl"
+PLAYED_AGAINST_JOURNAL = "data/players_played_against.jsonl"
+
+# Added to the name of a journal once its scrape has finished, so the next scrape starts over
+COMPLETED_SUFFIX = ".done"
+
 
-URL_BASE = "https://www.basketball-reference.com/players/"
+@lru_cache(maxsize=None)
+def get_engine() -> FetchEngine:
+    """
+    Returns the fetch engine every request is sent through, created on first use. It paces requests to stay
+    within the site's rate limit, fetches several pages at once, and keeps the pages in an on-disk cache at
+    CACHE_DIRECTORY.
+    """
+    return FetchEngine(cache=ResponseCache(CACHE_DIRECTORY))
 
 
 def scrape_all_players() -> None:
@@ -23,17 +52,25 @@ def scrape_all_players() -> None:
 
     Does not return anything, stores a dictionary in json format at "data/players.json"
     """
-    all_players = {}
-    for letter in "abcdefghijklmnopqrstuvwxyz":
-        url = URL_BASE + letter + "/"
-        all_players.update(get_players_for_letter(url))
-        print("Scraped player names for letter", letter)
-        time.sleep(3.25)
-
+    all_players = get_all_players()
     with open("data/players.json", "w", encoding="utf-8") as f:
         json.dump(all_players, f, indent=4)
 
 
+def get_all_players() -> dict:
+    """
+    Returns a dictionary mapping player id to player name of all NBA/ABA players, scraped from
+    the player index page of every letter.
+    """
+    all_players = {}
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    urls = [f"{SITE}/players/{c}/" for c in letters]
+    for letter, players in zip(letters, get_engine().map(get_players_for_letter, urls)):
+        all_players.update(players)
+        print("Scraped player names for letter", letter)
+    return all_players
+
+
 def get_players_for_letter(url: str) -> dict:
     """
     Returns a dictionary mapping player id to player name of all NBA/ABA players
@@ -43,8 +80,7 @@ def get_players_for_letter(url: str) -> dict:
         - url is a string of the form "https://www.basketball-reference.com/players/{letter}/"
           where letter is a character in "abcdefghijklmnopqrstuvwxyz"
     """
-    request = requests.get(url)
-    soup = BeautifulSoup(request.text, 'html.parser')
+    soup = BeautifulSoup(get_engine().fetch_text(url), 'html.parser')
     players_dict = {}
     th_tags = soup.find_all("th", attrs={"data-append-csv": True})
     for tag in th_tags:
@@ -122,7 +158,7 @@ def parse_individual_player(tags: Any) -> dict:
     return players_stats
 
 
-def scrape_individual_player(player_id: str, max_retries: int = 3, retry_delay: int = 5) -> dict:
+def scrape_individual_player(player_id: str, max_retries: int = 3, retry_delay: int = 5) -> Optional[dict]:
     """
     Given a player_id, returns a dictionary of player data for the player.
     Given the scope and length of requests, max_retries and retry_delay allow 
@@ -130,37 +166,32 @@ def scrape_individual_player(player_id: str, max_retries: int = 3, retry_delay:
     If omitted, max_retries defaults to 3 retries and a delay base of 5 
     (which grows by factor 1.5 per retry) seconds.
 
-    Returns a dictionary of player data.
+    Returns a dictionary of player data, or None if it could not be scraped.
 
     Preconditions:
         - player_id is a valid player id found on basketball-reference.com
         - max_retries > 1
         - retry_delay > 0
     """
-    url = f"https://www.basketball-reference.com/players/{player_id[0]}/{player_id}.html"
-    player_data = {}
+    url = f"{SITE}/players/{player_id[0]}/{player_id}.html"
 
-    for attempt in range(max_retries):
-        try:
-            soup = get_player_soup(url)
-
-            # Extract data from soup
-            totals_div = soup.find("div", attrs={"id": "div_totals_stats"})
-            player_data = extract_player_data(soup, totals_div)
-            break
-        except Exception as e:
-            if not handle_retry(attempt, max_retries, retry_delay, player_id, e):
-                return []  # returns empty list in case of failure
-            retry_delay *= 1.5  # increase backoff for subsequent retries
+    try:
+        soup = get_player_soup(url, RetryPolicy(max_retries, retry_delay), player_id)
+    except requests.RequestException:
+        return None
 
-    return player_data
+    try:
+        # Extract data from soup
+        totals_div = soup.find("div", attrs={"id": "div_totals_stats"})
+        return extract_player_data(soup, totals_div)
+    except Exception as e:
+        print(f"Failed to parse data for {player_id}: {str(e)}")
+        return None
 
 
-def get_player_soup(url: str) -> BeautifulSoup:
+def get_player_soup(url: str, retry: Optional[RetryPolicy] = None, label: Optional[str] = None) -> BeautifulSoup:
     """Helper function to get soup from URL"""
-    request = requests.get(url, timeout=10)
-    request.raise_for_status()
-    return BeautifulSoup(request.text, 'html.parser')
+    return BeautifulSoup(get_engine().fetch_text(url, retry, label), 'html.parser')
 
 
 def extract_player_data(soup: BeautifulSoup, totals_div: Any) -> dict:
@@ -186,7 +217,7 @@ def extract_player_data(soup: BeautifulSoup, totals_div: Any) -> dict:
     # assemble result
     result.update({
         "seasons": seasons,
-        "active": "2024-25" in years_set,
+        "active": CURRENT_SEASON in years_set,
         "last_team": team_cells[-1].text,
         "first_team": team_cells[0].text,
         "stats": stats
@@ -204,16 +235,56 @@ def extract_years(player_tables: Any) -> set:
     return years_set
 
 
-def handle_retry(attempt: int, max_retries: int, retry_delay: int, player_id: str, error: Exception) -> bool:
-    """Helper function to handle retry logic. Returns True if should retry."""
-    if attempt < max_retries - 1:
-        print(f"Error fetching data for {player_id}: {str(error)}. Retrying in {retry_delay} seconds... "
-              f"(Attempt {attempt + 1}/{max_retries})")
-        time.sleep(retry_delay)
-        return True
-    else:
-        print(f"Failed to fetch data for {player_id} after {max_retries} attempts: {str(error)}")
-        return False
+def record_result(journal: ScrapeJournal, name: str, player_data: Optional[Any]) -> None:
+    """
+    Records a player's scrape result in the journal. A failed scrape (None) is recorded as failed, with an
+    empty list standing in for the player's data, as the datasets have always stored failures.
+    """
+    journal.record(name, [] if player_data is None else player_data, failed=player_data is None)
+
+
+def open_journal(journal_path: str) -> ScrapeJournal:
+    """Opens the journal at journal_path, reporting whether an incomplete entry had to be dropped from it."""
+    journal = ScrapeJournal(journal_path)
+    if journal.dropped_offset is not None:
+        print(f"Dropped an incomplete entry at byte {journal.dropped_offset} of {journal_path}")
+    return journal
+
+
+def discard_journal(journal_path: str) -> None:
+    """Deletes the unfinished journal at journal_path, if there is one, so the next scrape starts over."""
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+
+def scrape_with_journal(players: dict, scrape: Callable[[str], Optional[Any]], journal_path: str,
+                        output_path: str, description: str = "") -> None:
+    """
+    Calls scrape on the id of every player in players (mapping player id to player name) who is not already
+    in the journal at journal_path, recording each result in the journal as soon as it arrives. scrape
+    returns None for a player it failed to scrape. Then writes every player's result to output_path, mapping
+    player name to result.
+
+    If an earlier call stopped before finishing, the players in its journal are skipped; call discard_journal
+    first to start over instead. Once output_path is written, the journal is renamed with COMPLETED_SUFFIX,
+    so the next call starts a fresh scrape rather than reusing this one.
+
+    If description is given, the length of each result is printed after it.
+    """
+    with open_journal(journal_path) as journal:
+        remaining = [player_id for player_id in players if players[player_id] not in journal]
+        cnt = len(players) - len(remaining)
+        if cnt:
+            print(f"Resuming from {journal_path} with {cnt} players already done")
+
+        for player, player_data in zip(remaining, get_engine().map(scrape, remaining)):
+            record_result(journal, players[player], player_data)
+            cnt += 1
+            detail = f" {description}: {len(player_data or [])}" if description else ""
+            print(f"Count: {cnt}/{len(players)} Player: {players[player]}{detail}")
+
+        journal.compact(output_path, players.values())
+    os.replace(journal_path, journal_path + COMPLETED_SUFFIX)
 
 
 def generate_all_player_stats() -> None:
@@ -221,49 +292,47 @@ def generate_all_player_stats() -> None:
     Generates a json file with all player stats for all players in "data/players.json"
     """
     players = get_players_json("data/players.json")
-    player_stats = {}
-    cnt = 0
-    for player in players:
-        player_data = scrape_individual_player(player)
-        player_stats[players[player]] = player_data
-        cnt += 1
-        print(f"Count: {cnt}/{len(players)} Player: {players[player]}")
+    scrape_with_journal(players, scrape_individual_player, STATS_JOURNAL, "data/players_stats.json")
 
-        if cnt % 50 == 0 or cnt == len(players):
-            print(f"Saving progress at {cnt} players...")
-            with open("data/players_played_against_copy.json", "w", encoding="utf-8") as f:
-                json.dump(player_stats, f, indent=4)
-            print("Progress saved. Continuing...")
 
-        time.sleep(3.25)  # avoid ratelimit (1 request per 3s)
-    with open("data/players_stats.json", "w", encoding="utf-8") as f:
-        json.dump(player_stats, f, indent=4)
+def journal_from_dataset(dataset_path: str, journal_path: str) -> None:
+    """
+    Records every entry of the dataset at dataset_path in a new journal at journal_path. Entries that are
+    lists are the stand-ins left by failed scrapes, and are recorded as failed.
+    """
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    with ScrapeJournal(journal_path, sync=False) as journal:
+        for name, player_data in dataset.items():
+            journal.record(name, player_data, failed=isinstance(player_data, list))
+        os.fsync(journal.file.fileno())
 
 
 def gen_all_missing_player_stats() -> None:
     """
-    Fills in missing player stats due to failures.
+    Fills in missing player stats due to failures, as recorded in the journal of the last finished
+    run of generate_all_player_stats. Without that journal (for data scraped before journals were kept),
+    the failed entries are found in "data/players_stats.json" itself.
     """
+    journal_path = STATS_JOURNAL + COMPLETED_SUFFIX
+    if not os.path.exists(journal_path):
+        journal_from_dataset("data/players_stats.json", journal_path)
+
     players = get_players_json("data/players.json")
-    with open("data/players_stats.json", "r", encoding="utf-8") as f:
-        player_stats = json.load(f)
-    for player in player_stats:
-        if not isinstance(player_stats[player], list):
-            continue
+    player_ids = {value: key for key, value in players.items()}
 
-        # find matching key for value in players
-        for key, value in players.items():
-            if value == player:
-                player_stats[player] = scrape_individual_player(key)
-                print(f"Player: {player} Stats: {player_stats[player]}")
-                time.sleep(3.25)  # avoid ratelimit (1 request per 3s)
-                break
+    with open_journal(journal_path) as journal:
+        missing = [name for name in journal.offsets if name in journal.failed and name in player_ids]
+        missing_data = get_engine().map(lambda name: scrape_individual_player(player_ids[name]), missing)
+        for player, player_data in zip(missing, missing_data):
+            record_result(journal, player, player_data)
+            print(f"Player: {player} Stats: {player_data}")
 
-    with open("data/players_stats.json", "w", encoding="utf-8") as f:
-        json.dump(player_stats, f, indent=4)
+        journal.compact("data/players_stats.json", players.values())
 
 
-def players_played_with(player_id: str, s_type: str, max_retries: int = 3, retry_delay: int = 5) -> list:
+def players_played_with(player_id: str, s_type: str, max_retries: int = 3,
+                        retry_delay: int = 5) -> Optional[list]:
     """
     Given a player_id, find all teammates or opponents, depending on input, of the player. 
     Given the scope and length of requests, max_retries and retry_delay allow for multiple 
@@ -271,7 +340,8 @@ def players_played_with(player_id: str, s_type: str, max_retries: int = 3, retry
     If omitted, max_retries defaults to 3 retries and a delay base of 5 
     (which grows by factor 1.5 per retry) seconds.
 
-    Returns a list of all names of players which player_id has played with.
+    Returns a list of all names of players which player_id has played with, or None if the
+    page could not be fetched.
 
     Preconditions:
         - player_id is a valid player id found on basketball-reference.com
@@ -281,32 +351,20 @@ def players_played_with(player_id: str, s_type: str, max_retries: int = 3, retry
 
     """
 
-    url = f"https://www.basketball-reference.com/friv/teammates_and_opponents.fcgi?pid={player_id}&type={s_type}"
-    delay_exponent = 1.5
+    url = f"{SITE}/friv/teammates_and_opponents.fcgi?pid={player_id}&type={s_type}"
     players_list = []
 
-    for attempt in range(max_retries):
-        try:
-            request = requests.get(url, timeout=10)
-            request.raise_for_status()  # raise an exception for 4XX/5XX responses
-            soup = BeautifulSoup(request.text, 'html.parser')
-            # filter all td tags with attribute "data-stat" with value pid2 in it
-            tbody = soup.find("tbody")
-            tr_tags = tbody.find_all("tr") if tbody else []
-            for tag in tr_tags:
-                teammate_data = [td.get_text().strip("*") for td in tag.find_all("td")]
-                players_list.append(parse_player_data(teammate_data))
-            break
-        except (requests.RequestException, requests.HTTPError) as e:
-            if attempt < max_retries - 1:
-                print(f"Error fetching data for {player_id}: {str(e)}. Retrying in {retry_delay} seconds... "
-                      f"(Attempt {attempt + 1}/{max_retries})")
-                time.sleep(retry_delay)
-                # increase backoff for subsequent retries
-                retry_delay *= delay_exponent
-            else:
-                print(f"Failed to fetch data for {player_id} after {max_retries} attempts: {str(e)}")
-                return []  # returns empty list in case of failure
+    try:
+        soup = get_player_soup(url, RetryPolicy(max_retries, retry_delay), player_id)
+    except requests.RequestException:
+        return None
+
+    # filter all td tags with attribute "data-stat" with value pid2 in it
+    tbody = soup.find("tbody")
+    tr_tags = tbody.find_all("tr") if tbody else []
+    for tag in tr_tags:
+        teammate_data = [td.get_text().strip("*") for td in tag.find_all("td")]
+        players_list.append(parse_player_data(teammate_data))
 
     return players_list
 
@@ -355,18 +413,9 @@ def gen_players_played_with() -> None:
     Returns nothing.
     """
 
-    data = {}
     players = get_players_json("data/players.json")
-    cnt = 0
-
-    for player in players:
-        player_data = players_played_with(player, "t")
-        data[players[player]] = player_data
-        cnt += 1
-        print(f"Count: {cnt}/{len(players)} Player: {players[player]} Played with: {len(player_data)}")
-        time.sleep(3.25)  # avoid ratelimit (1 request per 3s)
-    with open("data/players_played_with.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    scrape_with_journal(players, lambda p: players_played_with(p, "t"), PLAYED_WITH_JOURNAL,
+                        "data/players_played_with.json", "Played with")
 
 
 def gen_players_played_against() -> None:
@@ -383,29 +432,20 @@ def gen_players_played_against() -> None:
     Returns nothing.
     """
 
-    data = {}
     players = get_players_json("data/players.json")
-    cnt = 0
-
-    for player in enumerate(players):
-        player_data = players_played_with(player, "o")
-        data[players[player]] = player_data
-        cnt += 1
-        print(f"Count: {cnt}/{len(players)} Player: {players[player]} Played against: {len(player_data)}")
+    scrape_with_journal(players, lambda p: players_played_with(p, "o"), PLAYED_AGAINST_JOURNAL,
+                        "data/players_played_against.json", "Played against")
 
-        # Save progress every 50 players
-        if cnt % 50 == 0 or cnt == len(players):
-            print(f"Saving progress at {cnt} players...")
-            with open("data/players_played_against.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
-            print("Progress saved. Continuing...")
 
-        time.sleep(3.25)  # avoid ratelimit (1 request per 3s)
-
-    # Final save in case the total count wasn't divisible by 50
-    if len(players) % 50 != 0:
-        with open("data/players_played_against.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+def ask_resume(journal_path: str) -> None:
+    """
+    If there is an unfinished scrape recorded in the journal at journal_path, asks on the console whether
+    to resume it, and discards the journal if not.
+    """
+    if not os.path.exists(journal_path):
+        return
+    if input(f"Resume the unfinished scrape recorded in {journal_path}? (Y/N) ") != "Y":
+        discard_journal(journal_path)
 
 
 def test_run_and_save() -> None:
@@ -418,22 +458,10 @@ def test_run_and_save() -> None:
     test_teammates = {}
     test_opponents = {}
 
-    for player_t in players_test:
-
-        player_stats = scrape_individual_player(player_t)
-        test_player_data[player_t] = player_stats
-
-        time.sleep(3.25)  # avoid ratelimit
-
-        teammates = players_played_with(player_t, "t")
-        test_teammates[player_t] = teammates
-
-        time.sleep(3.25)
-
-        opponents = players_played_with(player_t, "o")
-        test_opponents[player_t] = opponents
-
-        time.sleep(3.25)
+    engine = get_engine()
+    test_player_data.update(zip(players_test, engine.map(scrape_individual_player, players_test)))
+    test_teammates.update(zip(players_test, engine.map(lambda p: players_played_with(p, "t"), players_test)))
+    test_opponents.update(zip(players_test, engine.map(lambda p: players_played_with(p, "o"), players_test)))
 
     # save results
     with open("test_player_data.json", "w", encoding="utf-8") as f:
@@ -457,7 +485,7 @@ if __name__ == "__main__":
     })
 
     print("Do you want to do a small test run of the webscraper? ")
-    print("No data will be saved, and this will take around 50 seconds.")
+    print("No data will be saved, and this will take around 30 seconds.")
     print("The extracted information will simply be printed to console.")
     test_run = input("Do you want to do a small test run? (Y/N) ")
     if test_run == "Y":
@@ -466,9 +494,9 @@ if __name__ == "__main__":
         test_run_and_save()
 
     # The below functions were run to generate the data
-    # WARNING: running the webscraper will take approx ~6.25 hours with 5000+ web requests
+    # WARNING: running the webscraper will take approx ~4.5 hours with 5000+ web requests
 
-    print("WARNING: running the all webscraper will take days with 15000+ web requests total.")
+    print("WARNING: running the all webscraper will take over 12 hours with 15000+ web requests total.")
     player_scrape = input("Scrape all players? (Y/N) ")
     if player_scrape == "Y":
         print("Starting scrape")
@@ -476,14 +504,17 @@ if __name__ == "__main__":
     teammate_scrape = input("Scrape all teammates of players? (Y/N) (requires players.json) ")
     if teammate_scrape == "Y":
         print("Starting scrape")
+        ask_resume(PLAYED_WITH_JOURNAL)
         gen_players_played_with()  # generate the dataset
     opponent_scrape = input("Scrape all opponents of players? (Y/N) (requires players.json) ")
     if opponent_scrape == "Y":
         print("Starting scrape")
+        ask_resume(PLAYED_AGAINST_JOURNAL)
         gen_players_played_against()  # generate the dataset
     player_stats_scrape = input("Scrape all player stats? (Y/N) (requires players.json) ")
     if player_stats_scrape == "Y":
         print("Starting scrape")
+        ask_resume(STATS_JOURNAL)
         generate_all_player_stats()
 
     print("Done.")
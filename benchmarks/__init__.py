@@ -0,0 +1,4 @@
+"""
+Benchmarks for the visualization tool. Run each benchmark from the repository root, e.g.
+python -m benchmarks.bench_startup
+"""
@@ -0,0 +1,114 @@
+"""
+Compare the original nested-loop join of archive/datacleaning.py against the streaming hash join of cleaning.py,
+on generated teammate and opponent datasets for a growing number of active players. Both are checked to produce
+the same connections. Run from the repository root with: python -m benchmarks.bench_cleaning
+"""
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from benchmarks.synthetic import STATS_FILE, generate_scraped_datasets
+from cleaning import OUTPUT_FILE, PLAYED_AGAINST_FILE, PLAYED_WITH_FILE, clean_datasets
+
+PLAYER_COUNTS = [25, 50, 100]
+
+
+def nested_loop_clean(directory: str) -> dict:
+    """
+    The original join of archive/datacleaning.py, kept here as the baseline, reading from directory and returning
+    the result instead of leaving it unsaved.
+    """
+    active_players = set()
+    with open(os.path.join(directory, STATS_FILE), 'r') as openfile:
+        data = json.load(openfile)
+        for name, info in data.items():
+            if info['active']:
+                active_players.add(name)
+
+    with open(os.path.join(directory, PLAYED_WITH_FILE), 'r') as openfile:
+        played_with = json.load(openfile)
+    with open(os.path.join(directory, PLAYED_AGAINST_FILE), 'r') as openfile:
+        played_against = json.load(openfile)
+
+    dic = {}
+    for player in active_players:
+        teammates, opponents = set(), set()
+        for entry in played_with.get(player, []):
+            teammates.add(entry['name'])
+        for entry in played_against.get(player, []):
+            opponents.add(entry['name'])
+
+        shared_names = (teammates.union(opponents)).union(active_players)
+        dic[player] = []
+        for shared_player in shared_names:
+            teammate_stats = next((x for x in played_with.get(player, []) if x['name'] == shared_player), None)
+            opponent_stats = next((x for x in played_against.get(player, []) if x['name'] == shared_player), None)
+            if teammate_stats and opponent_stats:
+                dic[player].append({
+                    "name": shared_player,
+                    "teammate_stats": teammate_stats,
+                    "opponent_stats": opponent_stats
+                })
+    return dic
+
+
+def hash_join_clean(directory: str) -> dict:
+    """Run cleaning.clean_datasets on directory and return the file it wrote."""
+    clean_datasets(directory)
+    with open(os.path.join(directory, OUTPUT_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def measure(clean: Callable[[str], object], directory: str) -> tuple[float, int]:
+    """Return the time in seconds clean takes on directory, and the most bytes of heap it allocated at once."""
+    start = time.perf_counter()
+    clean(directory)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    clean(directory)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def same_connections(result1: dict, result2: dict) -> bool:
+    """Return whether both results give every player the same connections, in any order."""
+    def normalize(result: dict) -> dict:
+        return {name: sorted(json.dumps(entry, sort_keys=True) for entry in entries)
+                for name, entries in result.items()}
+    return normalize(result1) == normalize(result2)
+
+
+def run() -> None:
+    """Print the time, peak heap and output agreement of both joins for each player count."""
+    with open(STATS_FILE, "r") as f:
+        stats_data = json.load(f)
+    active = [name for name, info in stats_data.items() if info["active"]]
+
+    print(f"{'players':>8} {'input MB':>9} {'nested loop':>12} {'heap MB':>8} {'hash join':>10} {'heap MB':>8} "
+          f"{'same':>5}")
+    for count in PLAYER_COUNTS:
+        with tempfile.TemporaryDirectory() as directory:
+            played_with, played_against = generate_scraped_datasets(stats_data, active[:count])
+            for file_name, data in ((STATS_FILE, stats_data), (PLAYED_WITH_FILE, played_with),
+                                    (PLAYED_AGAINST_FILE, played_against)):
+                with open(os.path.join(directory, file_name), "w") as f:
+                    json.dump(data, f, indent=4)
+            del played_with, played_against
+            input_size = sum(os.path.getsize(os.path.join(directory, file_name))
+                             for file_name in (PLAYED_WITH_FILE, PLAYED_AGAINST_FILE))
+
+            old_time, old_heap = measure(nested_loop_clean, directory)
+            new_time, new_heap = measure(clean_datasets, directory)
+            same = same_connections(nested_loop_clean(directory), hash_join_clean(directory))
+
+        print(f"{count:>8} {input_size / 1e6:>9.1f} {old_time:>11.2f}s {old_heap / 1e6:>8.1f} "
+              f"{new_time:>9.2f}s {new_heap / 1e6:>8.1f} {str(same):>5}")
+
+
+if __name__ == "__main__":
+    run()
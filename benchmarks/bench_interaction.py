@@ -0,0 +1,238 @@
+"""
+Replay a scripted session of the visualization tool without a window, using SDL's dummy video driver, and record
+how long the graph takes to build, how long each frame and each generate_nodes call takes, and the peak memory.
+The results are written to a JSON file so runs on different commits can be compared. Run from the repository root
+with: python -m benchmarks.bench_interaction [--output FILE] [--baseline FILE]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from typing import Callable, Iterator, Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from benchmarks.bench_startup import load_from_json, load_from_snapshot
+from benchmarks.synthetic import STATS_FILE, connections_path
+from classes import Graph
+from snapshot import SNAPSHOT_FILE
+from visualization import Visualization
+
+try:
+    import resource
+except ImportError:  # Only available on Unix
+    resource = None
+
+OUTPUT_FILE = "benchmarks/results/interaction.json"
+
+# The teams clicked in the scripted session
+SESSION_TEAMS = ["BOS", "LAL", "GSW", "MIA", "SAS"]
+
+# Each action is (kind, argument): click a team button, click the nth team box or opponent box node (wrapping
+# around), scroll the mouse wheel over a box (positive zooms in), or spend frames without any input.
+Action = tuple[str, object]
+Frame = tuple[list[pygame.event.Event], tuple[int, int]]
+
+
+def session_script(teams: list[str]) -> list[Action]:
+    """
+    Return the scripted session: for each team, pick a few players, page through their connections, compare
+    them against some opponents, and zoom both boxes in and out.
+    """
+    script = []
+    for team in teams:
+        script.append(("team", team))
+        script.append(("idle", 5))
+        for player in range(3):
+            script.append(("player", player))
+            script.append(("idle", 2))
+            script.append(("player", player))  # the next page of connections, if there is one
+            for opponent in range(0, 15, 5):
+                script.append(("opponent", opponent))
+            script.append(("zoom_opponents", 8))
+            script.append(("zoom_opponents", -8))
+        script.append(("zoom_team", 5))
+        script.append(("zoom_team", -5))
+        script.append(("idle", 10))
+    return script
+
+
+def left_click(point: tuple[int, int]) -> Frame:
+    """Return the frame of a left click at the given point."""
+    return [pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=point)], point
+
+
+def action_frames(visualization: Visualization, action: Action) -> Iterator[Frame]:
+    """
+    Yield the frames of the given action. Node positions are looked up as each frame is reached, since they
+    depend on the earlier actions.
+    """
+    kind, argument = action
+    if kind == "team":
+        sidebar = visualization.sidebar
+        button = next(button for button in sidebar.team_buttons if button.team == argument)
+        yield left_click(button.button.move(sidebar.sidebar.topleft).center)
+    elif kind in ("player", "opponent"):
+        box = visualization.teambox if kind == "player" else visualization.opponentbox
+        if box.current_player_nodes:
+            box.transform_nodes()
+            centers = box.node_centers().tolist()
+            yield left_click(tuple(centers[argument % len(centers)]))
+    elif kind in ("zoom_team", "zoom_opponents"):
+        box = visualization.teambox if kind == "zoom_team" else visualization.opponentbox
+        direction = 1 if argument > 0 else -1
+        for _ in range(abs(argument)):
+            yield [pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=direction)], box.box.center
+    elif kind == "idle":
+        for _ in range(argument):
+            yield [], (0, 0)
+
+
+def replay(visualization: Visualization, script: list[Action]) -> list[float]:
+    """Replay the script and return the time in milliseconds of every frame."""
+    frame_times = []
+    for action in script:
+        for events, point in action_frames(visualization, action):
+            start = time.perf_counter()
+            visualization.run_frame(events, point)
+            frame_times.append((time.perf_counter() - start) * 1000)
+    return frame_times
+
+
+def summarize(timings: list[float]) -> dict[str, float]:
+    """Return the count, mean, 50th/90th/99th percentiles and maximum of the timings."""
+    if len(timings) < 2:
+        timings = timings * 2 or [0.0, 0.0]
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "count": len(timings),
+        "mean": statistics.fmean(timings),
+        "p50": percentiles[49],
+        "p90": percentiles[89],
+        "p99": percentiles[98],
+        "max": max(timings),
+    }
+
+
+def time_calls(function: Callable[[object], object], arguments: list) -> list[float]:
+    """Return the time in milliseconds of calling function on each of the arguments."""
+    timings = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def peak_traced_memory(function: Callable[[], object]) -> int:
+    """Return the most bytes of Python heap allocated at once while function runs."""
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def build_graph() -> tuple[Graph, str]:
+    """Build the graph the way main.py does, and return it with the name of the data it was built from."""
+    if os.path.exists(SNAPSHOT_FILE):
+        return load_from_snapshot(SNAPSHOT_FILE), "snapshot"
+    return load_from_json(STATS_FILE, connections_path()), "json"
+
+
+def current_commit() -> Optional[str]:
+    """Return the hash of the checked out git commit, or None if it cannot be found."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run(seed: int = 111) -> dict:
+    """Run the benchmark and return its results."""
+    random.seed(seed)
+    start = time.perf_counter()
+    graph, source = build_graph()
+    build_time = (time.perf_counter() - start) * 1000
+
+    visualization = Visualization(graph)
+    visualization.run_frame([], (0, 0))
+    script = session_script(SESSION_TEAMS)
+    frame_times = replay(visualization, script)
+
+    teambox, opponentbox = visualization.teambox, visualization.opponentbox
+    team_times = time_calls(teambox.generate_nodes, SESSION_TEAMS)
+    player_nodes = list(teambox.current_player_nodes.values())
+    opponent_times = []
+    for player_node in player_nodes:
+        opponentbox.refresh()
+        opponent_times += time_calls(opponentbox.generate_nodes, [player_node])
+
+    # Measured separately, since tracing allocations slows everything else down
+    build_heap = peak_traced_memory(build_graph)
+    replay_heap = peak_traced_memory(lambda: replay(visualization, script))
+    pygame.quit()
+
+    results = {
+        "commit": current_commit(),
+        "graph_source": source,
+        "graph_build_ms": build_time,
+        "frame_ms": summarize(frame_times),
+        "team_generate_nodes_ms": summarize(team_times),
+        "opponent_generate_nodes_ms": summarize(opponent_times),
+        "graph_build_peak_heap_mb": build_heap / 1e6,
+        "replay_peak_heap_mb": replay_heap / 1e6,
+    }
+    if resource is not None:
+        # Kilobytes on Linux
+        results["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+    return results
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Print every numeric result next to the baseline's, with the relative change."""
+    def flatten(values: dict, prefix: str = "") -> dict[str, float]:
+        flat = {}
+        for key, value in values.items():
+            if isinstance(value, dict):
+                flat.update(flatten(value, f"{prefix}{key}."))
+            elif isinstance(value, (int, float)):
+                flat[prefix + key] = value
+        return flat
+
+    current, previous = flatten(results), flatten(baseline)
+    print(f"baseline commit: {baseline.get('commit')}")
+    for key, value in current.items():
+        if key in previous:
+            change = (value - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+            print(f"{key:<36} {previous[key]:>10.3f} -> {value:>10.3f} ({change:+.1f}%)")
+
+
+def main() -> None:
+    """Run the benchmark, write the results, and compare them against a baseline if one is given."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default=OUTPUT_FILE, help="where to write the results as JSON")
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = run()
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(json.dumps(results, indent=4))
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
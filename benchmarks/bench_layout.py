@@ -0,0 +1,72 @@
+"""
+Compare the original rejection-sampling layout of DisplayBox.get_points against the grid-accelerated
+Poisson-disk sampler, for node counts from 10 to 500 in a box the size of the opponent box.
+Run from the repository root with: python -m benchmarks.bench_layout
+"""
+import math
+import random
+import time
+
+from display_containers import DisplayBox
+from display_objects import PositionalData
+
+NODE_COUNTS = [10, 25, 50, 100, 200, 300, 400, 500]
+
+
+def layout_bounds(box: DisplayBox, num_of_players: int) -> tuple[tuple[int, int, int, int], int]:
+    """Return the sampling bounds and minimum distance that DisplayBox.get_points uses for num_of_players."""
+    total_area = box.positional_data.width * box.positional_data.height
+    radius = min(int(math.sqrt((total_area // num_of_players) // math.pi)) // 4, 40)
+    min_spacing = radius * 4
+    bounds = (box.positional_data.left + min_spacing,
+              box.positional_data.top + min_spacing,
+              box.positional_data.left + box.positional_data.width - min_spacing,
+              box.positional_data.top + box.positional_data.height - min_spacing)
+    return bounds, min_spacing + 20
+
+
+def rejection_sample(box: DisplayBox, num_of_players: int) -> bool:
+    """
+    The original sampling loop of DisplayBox.get_points, kept here as the baseline. Return whether a random
+    arrangement was found, rather than falling back to the ordered one.
+    """
+    (x_min, y_min, x_max, y_max), min_distance = layout_bounds(box, num_of_players)
+    randomized_points = []
+    count = 0
+    while len(randomized_points) < num_of_players and count < 50000:
+        new_point = (random.randint(x_min, x_max), random.randint(y_min, y_max))
+        if all(math.dist(new_point, point) >= min_distance for point in randomized_points):
+            randomized_points.append(new_point)
+        count += 1
+    return len(randomized_points) == num_of_players
+
+
+def poisson_disk_sample(box: DisplayBox, num_of_players: int) -> bool:
+    """
+    Run the Poisson-disk sampler with the same bounds, skipping it when the box cannot fit num_of_players as
+    DisplayBox.get_points does. Return whether a random arrangement was found.
+    """
+    bounds, min_distance = layout_bounds(box, num_of_players)
+    if box.poisson_disk_capacity(bounds, min_distance) < num_of_players:
+        return False
+    return len(box.poisson_disk_sample(bounds, min_distance, max_points=num_of_players)) >= num_of_players
+
+
+def run(repeats: int = 5, seed: int = 111) -> None:
+    """Print the mean sampling time of both samplers and how often each found a random arrangement."""
+    random.seed(seed)
+    box = DisplayBox(None, PositionalData(1100, 450, 0, 450))
+    print(f"{'nodes':>6} {'rejection':>12} {'random':>7} {'poisson-disk':>13} {'random':>7}")
+    for count in NODE_COUNTS:
+        timings, found = [], []
+        for sample in (rejection_sample, poisson_disk_sample):
+            start = time.perf_counter()
+            found.append(sum(sample(box, count) for _ in range(repeats)))
+            timings.append((time.perf_counter() - start) / repeats * 1000)
+
+        print(f"{count:>6} {timings[0]:>10.1f}ms {found[0]:>4}/{repeats} "
+              f"{timings[1]:>11.1f}ms {found[1]:>4}/{repeats}")
+
+
+if __name__ == "__main__":
+    run()
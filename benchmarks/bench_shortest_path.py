@@ -0,0 +1,70 @@
+"""
+Compare the original recursive depth-first Vertex.check_connected against Graph.shortest_path (bidirectional
+breadth-first search) and Graph.shortest_paths (batched). Run from the repository root with:
+python -m benchmarks.bench_shortest_path
+"""
+import random
+import time
+from typing import Optional
+
+from benchmarks.synthetic import load_datasets
+from classes import Graph, Vertex
+
+
+def recursive_check_connected(vertex: Vertex, name1: str, visited: set[Vertex]) -> Optional[list[Vertex]]:
+    """The original recursive implementation of Vertex.check_connected, kept here as the baseline."""
+    if vertex.name == name1:
+        return [vertex]
+
+    visited.add(vertex)
+    for n in vertex.neighbours:
+        if n.points_towards not in visited:
+            path = recursive_check_connected(n.points_towards, name1, visited)
+            if path:
+                return [vertex] + path
+
+    return None
+
+
+def run(pair_count: int = 200, seed: int = 111) -> None:
+    """
+    Print the total time, recursion errors and mean path length of each implementation over random player pairs,
+    then compare the batched and unbatched searches from one player to every other player.
+    """
+    graph = Graph(*load_datasets())
+    rng = random.Random(seed)
+    names = list(graph.vertices)
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(pair_count)]
+
+    def measure(label: str, find_paths) -> None:
+        start = time.perf_counter()
+        paths, failures = find_paths()
+        elapsed = time.perf_counter() - start
+        lengths = [len(path) - 1 for path in paths if path]
+        mean_length = sum(lengths) / len(lengths) if lengths else 0.0
+        print(f"{label:<26} {elapsed:8.3f}s  recursion errors: {failures:<4} mean path length: {mean_length:.2f}")
+
+    def recursive() -> tuple[list, int]:
+        paths, failures = [], 0
+        for name1, name2 in pairs:
+            try:
+                paths.append(recursive_check_connected(graph.vertices[name1], name2, set()))
+            except RecursionError:
+                failures += 1
+        return paths, failures
+
+    measure("recursive check_connected", recursive)
+    measure("iterative check_connected",
+            lambda: ([graph.vertices[name1].check_connected(name2, set()) for name1, name2 in pairs], 0))
+    measure("Graph.shortest_path", lambda: ([graph.shortest_path(name1, name2) for name1, name2 in pairs], 0))
+    measure("Graph.shortest_paths", lambda: (graph.shortest_paths(pairs), 0))
+
+    # Batching pays off when many pairs share a starting player
+    pairs = [(names[0], name2) for name2 in names]
+    print(f"one player to all {len(names)} others:")
+    measure("Graph.shortest_path", lambda: ([graph.shortest_path(name1, name2) for name1, name2 in pairs], 0))
+    measure("Graph.shortest_paths", lambda: (graph.shortest_paths(pairs), 0))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,98 @@
+"""
+Compare the startup cost and heap usage of building the player graph from the JSON datasets against building it
+from a compiled snapshot, and from the compressed bundle of the web build (which is decompressed into memory, as
+in the browser). Run from the repository root with: python -m benchmarks.bench_startup
+"""
+import gc
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import zlib
+from typing import Callable
+
+from benchmarks.synthetic import STATS_FILE, connections_path
+from classes import Graph
+from snapshot import Snapshot, convert_json
+
+
+def time_runs(function: Callable[[], Graph], repeats: int) -> list[float]:
+    """Return the wall-clock time in seconds of each of repeats calls to function."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        graph = function()
+        timings.append(time.perf_counter() - start)
+        graph.close()
+    return timings
+
+
+def retained_heap(function: Callable[[], Graph]) -> int:
+    """Return the number of bytes of Python heap still held by the result of function once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result.close()
+    del result
+    return retained
+
+
+def load_from_json(stats_file: str, connections_file: str) -> Graph:
+    """Build the graph the way main.py does without a snapshot."""
+    with open(stats_file, "r") as f:
+        stats_data = json.load(f)
+    with open(connections_file, "r") as f:
+        player_connections = json.load(f)
+    return Graph(stats_data, player_connections)
+
+
+def load_from_snapshot(snapshot_file: str) -> Graph:
+    """Build the graph the way main.py does with a snapshot."""
+    graph = Graph()
+    graph.load_snapshot(Snapshot.open(snapshot_file))
+    return graph
+
+
+def load_from_bundle(bundle_file: str) -> Graph:
+    """Build the graph the way main.py does with only the bundle of the web build."""
+    with open(bundle_file, "rb") as f:
+        buffer = zlib.decompress(f.read())
+    graph = Graph()
+    graph.load_snapshot(Snapshot(buffer))
+    return graph
+
+
+def run(repeats: int = 5) -> None:
+    """Print the median startup time, input size and retained heap of every loading path."""
+    connections_file = connections_path()
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_file = os.path.join(directory, "players_snapshot.bin")
+        bundle_file = os.path.join(directory, "players_bundle.z")
+        start = time.perf_counter()
+        convert_json(STATS_FILE, connections_file, snapshot_file, bundle_file)
+        print(f"conversion: {time.perf_counter() - start:.3f}s")
+
+        loaders = {
+            "json": (lambda: load_from_json(STATS_FILE, connections_file),
+                     os.path.getsize(STATS_FILE) + os.path.getsize(connections_file)),
+            "snapshot": (lambda: load_from_snapshot(snapshot_file), os.path.getsize(snapshot_file)),
+            "bundle": (lambda: load_from_bundle(bundle_file), os.path.getsize(bundle_file)),
+        }
+        medians = {}
+        for name, (load, size) in loaders.items():
+            medians[name] = statistics.median(time_runs(load, repeats))
+            heap = retained_heap(load)
+            print(f"{name + ':':<10}{medians[name]:.3f}s median over {repeats} runs, {size / 1e6:.1f} MB, "
+                  f"retained heap {heap / 1e6:.1f} MB")
+
+    for name in ("snapshot", "bundle"):
+        print(f"{name} speedup over json: {medians['json'] / medians[name]:.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,115 @@
+"""
+Helpers that provide the datasets used by the benchmarks. active_players.json is produced by
+archive/datacleaning.py and is not checked in, so when it is missing a deterministic stand-in with the same
+shape is generated from players_stats.json instead. Every run then compares against the same data.
+"""
+import json
+import os
+import random
+
+STATS_FILE = "players_stats.json"
+CONNECTIONS_FILE = "active_players.json"
+SYNTHETIC_FILE = "benchmarks/synthetic_active_players.json"
+
+
+def generate_edge_stats(rng: random.Random, name: str) -> dict:
+    """
+    Return a stats dictionary in the format of archive/webscraper.parse_player_data, with every value stored
+    as a string.
+    """
+    g_reg = rng.randint(1, 400)
+    g_ply = rng.randint(0, 40)
+    w_reg = rng.randint(0, g_reg)
+    w_ply = rng.randint(0, g_ply)
+    games, wins = g_reg + g_ply, w_reg + w_ply
+
+    def pct(w: int, g: int) -> str:
+        return f"{w / g:.3f}".lstrip("0") if g else "0"
+
+    return {
+        "name": name,
+        "games": str(games),
+        "wins": str(wins),
+        "losses": str(games - wins),
+        "w_pct": pct(wins, games),
+        "g_reg": str(g_reg),
+        "w_reg": str(w_reg),
+        "l_reg": str(g_reg - w_reg),
+        "w_pct_reg": pct(w_reg, g_reg),
+        "g_ply": str(g_ply),
+        "w_ply": str(w_ply),
+        "l_ply": str(g_ply - w_ply),
+        "w_pct_ply": pct(w_ply, g_ply),
+    }
+
+
+def generate_connections(stats_data: dict, max_degree: int = 400, seed: int = 111) -> dict:
+    """
+    Return a stand-in for active_players.json: every active player gets between 10 and max_degree
+    connections, mostly to other active players and occasionally to retired ones.
+    """
+    rng = random.Random(seed)
+    active = [name for name, info in stats_data.items() if info.get("active", False)]
+    retired = [name for name, info in stats_data.items() if not info.get("active", False)]
+    connections = {}
+    for name in active:
+        degree = min(rng.randint(10, max_degree), len(active) - 1)
+        others = rng.sample([other for other in active if other != name], degree)
+        others += rng.sample(retired, min(len(retired), degree // 10))
+        connections[name] = [
+            {
+                "name": other,
+                "teammate_stats": generate_edge_stats(rng, other),
+                "opponent_stats": generate_edge_stats(rng, other),
+            }
+            for other in others
+        ]
+    return connections
+
+
+def connections_path(directory: str = ".") -> str:
+    """
+    Return the path of the connections dataset used by the benchmarks. If active_players.json does not exist in
+    directory, a generated stand-in is written to SYNTHETIC_FILE once and its path is returned instead.
+    """
+    path = os.path.join(directory, CONNECTIONS_FILE)
+    if os.path.exists(path):
+        return path
+
+    path = os.path.join(directory, SYNTHETIC_FILE)
+    if not os.path.exists(path):
+        with open(os.path.join(directory, STATS_FILE), "r") as f:
+            stats_data = json.load(f)
+        with open(path, "w") as f:
+            json.dump(generate_connections(stats_data), f, indent=4)
+    return path
+
+
+def load_datasets(directory: str = ".") -> tuple[dict, dict]:
+    """
+    Return the (stats_data, player_connections) pair used by the benchmarks.
+    """
+    with open(os.path.join(directory, STATS_FILE), "r") as f:
+        stats_data = json.load(f)
+    with open(connections_path(directory), "r") as f:
+        player_connections = json.load(f)
+    return stats_data, player_connections
+
+
+def generate_scraped_datasets(stats_data: dict, players: list[str], max_opponents: int = 1500,
+                              seed: int = 111) -> tuple[dict, dict]:
+    """
+    Return stand-ins for the (players_played_with.json, players_played_against.json) pair scraped by
+    archive/webscraper.py, covering the given players of stats_data. Every player gets up to
+    max_opponents opponents, and roughly a third of those, plus a few players never faced, as teammates.
+    """
+    rng = random.Random(seed)
+    names = list(stats_data)
+    played_with, played_against = {}, {}
+    for name in players:
+        opponents = rng.sample(names, rng.randint(max_opponents // 10, max_opponents))
+        teammates = rng.sample(opponents, len(opponents) // 3) + rng.sample(names, 10)
+        rng.shuffle(teammates)
+        played_with[name] = [generate_edge_stats(rng, other) for other in teammates]
+        played_against[name] = [generate_edge_stats(rng, other) for other in opponents]
+    return played_with, played_against
@@ -2,75 +2,130 @@
 
 from __future__ import annotations
 import json
-from typing import Optional
+from array import array
+from collections import OrderedDict
+from typing import Iterable, Optional
+from snapshot import EDGE_COUNT_FIELDS, EDGE_PCT_FIELDS, Snapshot
 
 
 class Vertex:
     """Fill out this docstring"""
     name: str
+    index: int  # The id of this vertex in its graph, see Graph.vertices_by_id
     expanded_data: Optional[PlayerData] = None
     neighbours: set[Edge]  # (DEFINITION: INTERSECTION BETWEEN TEAMMATES + FORMER TEAMMATES AND OPPONENTS)
+    edges_by_name: dict[str, Edge]  # The same edges as neighbours, indexed by the name of the player they point to
+    # Averages over the neighbours, computed on first use (None until then)
+    avg_teammate_winrate: Optional[float] = None
+    avg_opponent_winrate: Optional[float] = None
 
     # Use the players_stats.json file for this since it's already formatted how we want it
-    def __init__(self, player_name: str) -> None:
-        """ Initialize a new vertex for a player with the given name
+    def __init__(self, player_name: str, index: int) -> None:
+        """ Initialize a new vertex for a player with the given name and graph id
 
         For now, player data will be set elsewhere (another function), maybe define later
         """
         self.name = player_name
+        self.index = index
         self.expanded_data = None
         self.neighbours = set()
+        self.edges_by_name = {}
+        self.avg_teammate_winrate = None
+        self.avg_opponent_winrate = None
 
     def check_connected(self, name1: str, visited: set[Vertex]) -> Optional[list[Vertex]]:
         """
-        Return either None or a path of connections between the two players as a list of vertexes.
+        Return either None or a shortest path of connections between the two players as a list of vertexes,
+        never passing through a player in visited. The search is an iterative breadth-first search, so it cannot
+        hit the recursion limit. Graph.shortest_path is faster when the whole graph is available.
 
         Preconditions:
             - self not in visited
         """
-        if self.name == name1:
-            return [self]
+        parents = {self: None}
+        frontier = [self]
+        while frontier:
+            next_frontier = []
+            for vertex in frontier:
+                if vertex.name == name1:
+                    path = []
+                    while vertex is not None:
+                        path.append(vertex)
+                        vertex = parents[vertex]
+                    return path[::-1]
+
+                visited.add(vertex)
+                for other_vertex in vertex.neighbour_vertices():
+                    if other_vertex not in visited and other_vertex not in parents:
+                        parents[other_vertex] = vertex
+                        next_frontier.append(other_vertex)
+            frontier = next_frontier
 
-        visited.add(self)
+        return None
+
+    def neighbour_ids(self) -> Iterable[int]:
+        """
+        Return the graph ids of the players this player has edges to.
+        """
+        return [n.points_towards.index for n in self.neighbours]
+
+    def neighbour_vertices(self) -> Iterable[Vertex]:
+        """
+        Return the vertices of the players this player has edges to, without needing the stats of the edges.
+        """
+        return [n.points_towards for n in self.neighbours]
+
+    def add_edge(self, edge: Edge) -> None:
+        """
+        Add an edge to this player's neighbours, invalidating the stored winrate averages.
+        """
+        self.neighbours.add(edge)
+        self.edges_by_name.setdefault(edge.points_towards.name, edge)
+        self.invalidate_winrate_aggregates()
+
+    def invalidate_winrate_aggregates(self) -> None:
+        """
+        Forget the stored winrate averages, so they are recomputed the next time they are needed.
+        Call whenever this player's neighbours change.
+        """
+        self.avg_teammate_winrate = None
+        self.avg_opponent_winrate = None
+
+    def compute_winrate_aggregates(self) -> None:
+        """
+        Compute and store this player's average teammate and opponent winrates, in a single pass over their edges.
+        """
+        teammate_total, teammate_count = 0.0, 0
+        opponent_total, opponent_count = 0.0, 0
         for n in self.neighbours:
-            if n.points_towards not in visited:
-                path = n.points_towards.check_connected(name1, visited)
-                if path:
-                    return [self] + path
+            teammate_w_pct, opponent_w_pct = n.teammate_stats.w_pct, n.opponent_stats.w_pct
+            if teammate_w_pct is not None:
+                teammate_total += teammate_w_pct
+                teammate_count += 1
+            if opponent_w_pct is not None:
+                opponent_total += opponent_w_pct
+                opponent_count += 1
 
-        return None
+        self.avg_teammate_winrate = teammate_total / teammate_count if teammate_count > 0 else 0.0
+        self.avg_opponent_winrate = opponent_total / opponent_count if opponent_count > 0 else 0.0
 
     def calc_avg_teammate_winrate(self) -> float:
         """
         Return a player's teammate average winrate across every player they've been both teammates and opponents with.
         Include playoff stats
         """
-        total_winrate = 0.0
-        count = 0
-        for n in self.neighbours:
-            if 'w_pct' in n.teammate_stats:
-                total_winrate += float(n.teammate_stats['w_pct'])
-                count += 1
-        if count > 0:
-            return total_winrate / count
-        else:
-            return 0.0
+        if self.avg_teammate_winrate is None:
+            self.compute_winrate_aggregates()
+        return self.avg_teammate_winrate
 
     def calc_avg_opponent_winrate(self) -> float:
         """
         Return a player's opponent average winrate across every player they've been both teammates and opponents with.
         Include playoff stats
         """
-        total_winrate = 0.0
-        count = 0
-        for n in self.neighbours:
-            if 'w_pct' in n.opponent_stats:
-                total_winrate += float(n.opponent_stats['w_pct'])
-                count += 1
-        if count > 0:
-            return total_winrate / count
-        else:
-            return 0.0
+        if self.avg_opponent_winrate is None:
+            self.compute_winrate_aggregates()
+        return self.avg_opponent_winrate
 
     def check_winrate_correlation(self) -> float:
         """
@@ -88,11 +143,10 @@ class Vertex:
         #    return (0.0, 0.0)
 
         teammate_success, opponent_success = 0.0, 0.0
-        for edge1 in self.neighbours:
-            if edge1.points_towards.name == name1:
-                teammate_success = float(edge1.teammate_stats.get("w_pct", 0.0))
-                opponent_success = float(edge1.opponent_stats.get("w_pct", 0.0))
-                break
+        edge1 = self.get_edge(name1)
+        if edge1 is not None:
+            teammate_success = edge1.teammate_stats.w_pct or 0.0
+            opponent_success = edge1.opponent_stats.w_pct or 0.0
 
         return (
             abs(self.calc_avg_teammate_winrate() - teammate_success),
@@ -104,29 +158,71 @@ class Vertex:
         If this player is adjacent to name1, return a dictionary containing the teammate and opponent stats for the
         corresponding edge. Otherwise, return None.
         """
-        for edge1 in self.neighbours:
-            if edge1.points_towards.name == name1:
-                return {
-                    'teammate_stats': edge1.teammate_stats,
-                    'opponent_stats': edge1.opponent_stats
-                }
-        return None
+        edge1 = self.get_edge(name1)
+        if edge1 is None:
+            return None
+        return {
+            'teammate_stats': edge1.teammate_stats,
+            'opponent_stats': edge1.opponent_stats
+        }
+
+    def get_edge(self, name1: str) -> Optional[Edge]:
+        """
+        Return the edge from this player to the player named name1, or None if they are not adjacent.
+        """
+        return self.edges_by_name.get(name1)
 
 
 class Graph:
     """Fill out this docstring"""
     vertices: dict[str, Vertex]
-
-    def __init__(self, stats_data: dict, player_connections: dict) -> None:
-        """Initialize an empty graph"""
+    snapshot: Optional[Snapshot] = None
+    vertices_by_id: list[Optional[Vertex]]  # vertex id -> vertex, None for snapshot players that are not in the graph
+    # Roster indexes: team -> players whose last (current) team it is, team -> players who started there,
+    # and season -> players who played in it. Built by build_roster_indexes once player data is loaded.
+    players_by_team: dict[str, list[Vertex]]
+    players_by_first_team: dict[str, list[Vertex]]
+    players_by_season: dict[str, list[Vertex]]
+    # Incoming edges as (offsets, source ids) arrays in the same layout as a snapshot's edges, built when first needed
+    reverse_adjacency: Optional[tuple[array, array]] = None
+    # Whether edges are still being added while the graph is in use (see loading.py)
+    loading: bool = False
+    # The players whose edges were added while loading, until they are collected by pop_updated_players
+    updated_players: set[str]
+    # The edges of the most recently used snapshot players, as vertex id -> (neighbours, neighbours by name).
+    # Once more than max_hydrated_players players are loaded, the least recently used player's edges are dropped.
+    hydrated_edges: OrderedDict[int, tuple[set[Edge], dict[str, Edge]]]
+    max_hydrated_players: int = 64
+
+    def __init__(self, stats_data: Optional[dict] = None, player_connections: Optional[dict] = None) -> None:
+        """Initialize a graph from the JSON datasets, or an empty graph if they are not given"""
         self.vertices = {}
-        self.initialize_graph(stats_data, player_connections)
+        self.vertices_by_id = []
+        self.reverse_adjacency = None
+        self.hydrated_edges = OrderedDict()
+        self.players_by_team = {}
+        self.players_by_first_team = {}
+        self.players_by_season = {}
+        self.updated_players = set()
+        if stats_data is not None and player_connections is not None:
+            self.initialize_graph(stats_data, player_connections)
 
     def initialize_graph(self, stats_data: dict, player_connections: dict) -> None:
         """
         Initialize a graph with vertices for all active players, creating edges where needed.
         """
-        for name, info in stats_data.items():
+        self.add_players(stats_data.items())
+        self.build_roster_indexes()
+
+        for name, connections in player_connections.items():
+            self.add_player_connections(name, connections)
+
+    def add_players(self, players: Iterable[tuple[str, dict]]) -> None:
+        """
+        Add a vertex for each active player in players, given as (name, info) pairs from players_stats.json.
+        Call build_roster_indexes once every player is added.
+        """
+        for name, info in players:
             # Add only the active players
             if info.get('active', False):
                 self.add_vertex(name)
@@ -137,29 +233,134 @@ class Graph:
 
                 self.vertices[name].expanded_data = player_stats
 
-        for name, connections in player_connections.items():
-            # Access the vertex of the player so we can add its edges
-            player_vertex = self.vertices.get(name)
+    def add_player_connections(self, name: str, connections: list[dict]) -> None:
+        """
+        Add the edges of the named player from its list of connections in active_players.json. Connections to
+        players that are not in the graph are skipped, so every player should be added first.
+        """
+        # Access the vertex of the player so we can add its edges
+        player_vertex = self.vertices.get(name)
 
-            # Shouldn't happen but be safe
-            if not player_vertex:
+        # Shouldn't happen but be safe
+        if not player_vertex:
+            return
+
+        for connection in connections:
+            other_name = connection['name']
+
+            # Apparently we need to skip players not in the graph
+            if other_name not in self.vertices:
                 continue
 
-            for connection in connections:
-                other_name = connection['name']
+            # Parse the scraped strings once, instead of on every access
+            tmt_stats = EdgeStats(connection.get('teammate_stats', {}))
+            opp_stats = EdgeStats(connection.get('opponent_stats', {}))
+
+            edge = Edge(points_towards=self.vertices[other_name],
+                        teammate_stats=tmt_stats,
+                        opponent_stats=opp_stats)
 
-                # Apparently we need to skip players not in the graph
-                if other_name not in self.vertices:
-                    continue
+            player_vertex.add_edge(edge)
+
+        self.reverse_adjacency = None
+        if self.loading:
+            self.updated_players.add(name)
+
+    def pop_updated_players(self) -> set[str]:
+        """
+        Return the names of the players whose edges were added while loading since this was last called, so
+        anything showing them can be rebuilt.
+        """
+        updated_players, self.updated_players = self.updated_players, set()
+        return updated_players
 
-                tmt_stats = connection.get('teammate_stats', {})
-                opp_stats = connection.get('opponent_stats', {})
+    def close(self) -> None:
+        """
+        Close the snapshot the graph was loaded from, if any, releasing the file its connection stats are read
+        from. Call once the graph is no longer used.
+        """
+        if self.snapshot is not None:
+            self.snapshot.close()
 
-                edge = Edge(points_towards=self.vertices[other_name],
-                            teammate_stats=tmt_stats,
-                            opponent_stats=opp_stats)
+    def load_snapshot(self, snapshot: Snapshot) -> None:
+        """
+        Initialize a graph with vertices for all active players from a compiled snapshot. Unlike initialize_graph,
+        no edges are built up front: a player's edges are loaded from the snapshot the first time they are used
+        (see get_snapshot_edges), so memory use grows with the players that are looked at, not with the dataset.
+        """
+        self.snapshot = snapshot
+        self.vertices_by_id = []
+        self.reverse_adjacency = None
+        self.hydrated_edges.clear()
+        for player in range(snapshot.player_count):
+            if not snapshot.player_active(player):
+                self.vertices_by_id.append(None)
+                continue
 
-                player_vertex.neighbours.add(edge)
+            name = snapshot.player_name(player)
+            first_team, last_team = snapshot.player_teams(player)
+            player_vertex = SnapshotVertex(name, self, player)
+            player_vertex.expanded_data = PlayerData(seasons=snapshot.player_seasons(player),
+                                                     first_team=first_team,
+                                                     last_team=last_team,
+                                                     stats=snapshot.player_stats(player))
+            self.vertices[name] = player_vertex
+            self.vertices_by_id.append(player_vertex)
+
+        self.build_roster_indexes()
+
+    def get_snapshot_edges(self, player_vertex: SnapshotVertex) -> tuple[set[Edge], dict[str, Edge]]:
+        """
+        Return the edges of a snapshot player as (neighbours, neighbours by name), loading them from the snapshot
+        if they are not among the edges of the max_hydrated_players most recently used players.
+        """
+        edges = self.hydrated_edges.get(player_vertex.index)
+        if edges is not None:
+            self.hydrated_edges.move_to_end(player_vertex.index)
+            return edges
+
+        neighbours, edges_by_name = set(), {}
+        for target, (teammate_stats, opponent_stats) in zip(player_vertex.neighbour_ids(),
+                                                            self.snapshot.player_edge_stats(player_vertex.index)):
+            other_vertex = self.vertices_by_id[target]
+            if other_vertex is not None:
+                edge = Edge(points_towards=other_vertex,
+                            teammate_stats=EdgeStats(teammate_stats),
+                            opponent_stats=EdgeStats(opponent_stats))
+                neighbours.add(edge)
+                edges_by_name[other_vertex.name] = edge
+
+        edges = (neighbours, edges_by_name)
+        self.hydrated_edges[player_vertex.index] = edges
+        if len(self.hydrated_edges) > self.max_hydrated_players:
+            self.hydrated_edges.popitem(last=False)
+        return edges
+
+    def build_roster_indexes(self) -> None:
+        """
+        Index the players by current team, first team and season, so that roster queries only cost the size of
+        their result. Call after the player data of every vertex has been set.
+        """
+        self.players_by_team, self.players_by_first_team, self.players_by_season = {}, {}, {}
+        for vertex in self.vertices.values():
+            if vertex.expanded_data is None:
+                continue
+            self.players_by_team.setdefault(vertex.expanded_data.last_team, []).append(vertex)
+            self.players_by_first_team.setdefault(vertex.expanded_data.first_team, []).append(vertex)
+            for season in vertex.expanded_data.seasons:
+                self.players_by_season.setdefault(season, []).append(vertex)
+
+    def get_team_roster(self, team: str) -> list[Vertex]:
+        """Return the players whose current (last) team is the given team code, e.g. "TOR"."""
+        return self.players_by_team.get(team, [])
+
+    def get_first_team_players(self, team: str) -> list[Vertex]:
+        """Return the players who started their career with the given team code."""
+        return self.players_by_first_team.get(team, [])
+
+    def get_season_players(self, season: str) -> list[Vertex]:
+        """Return the players who played in the given season, e.g. "2024-25"."""
+        return self.players_by_season.get(season, [])
 
     def add_vertex(self, player_name: str) -> None:
         """Add a vertex representing a player with the given name to this graph
@@ -167,7 +368,188 @@ class Graph:
         This vertex has no neighbours upon initialization.
         """
         if player_name not in self.vertices:
-            self.vertices[player_name] = Vertex(player_name)
+            self.vertices[player_name] = Vertex(player_name, len(self.vertices_by_id))
+            self.vertices_by_id.append(self.vertices[player_name])
+            self.reverse_adjacency = None
+
+    def get_edges(self, pairs: Iterable[tuple[str, str]]) -> list[Optional[Edge]]:
+        """
+        Given (player, opponent) name pairs, return the edge from each player to their opponent, in the same
+        order. A pair gets None if either player is not in the graph or they are not adjacent.
+        """
+        edges = []
+        for player_name, opponent_name in pairs:
+            player_vertex = self.vertices.get(player_name)
+            edges.append(player_vertex.get_edge(opponent_name) if player_vertex is not None else None)
+        return edges
+
+    def get_reverse_adjacency(self) -> tuple[array, array]:
+        """
+        Return the incoming edges of every vertex as (offsets, sources): the ids of the vertices with an edge to the
+        vertex with id i are sources[offsets[i]:offsets[i + 1]]. Built on first use and kept until the graph changes.
+        """
+        if self.reverse_adjacency is None:
+            counts = [0] * (len(self.vertices_by_id) + 1)
+            for vertex in self.vertices_by_id:
+                if vertex is not None:
+                    for other_id in vertex.neighbour_ids():
+                        counts[other_id + 1] += 1
+
+            offsets = array('I', counts)
+            for i in range(1, len(offsets)):
+                offsets[i] += offsets[i - 1]
+
+            sources = array('I', bytes(offsets[-1] * offsets.itemsize))
+            positions = list(offsets)
+            for vertex in self.vertices_by_id:
+                if vertex is not None:
+                    for other_id in vertex.neighbour_ids():
+                        sources[positions[other_id]] = vertex.index
+                        positions[other_id] += 1
+
+            self.reverse_adjacency = (offsets, sources)
+        return self.reverse_adjacency
+
+    def shortest_path(self, name1: str, name2: str) -> Optional[list[Vertex]]:
+        """
+        Return a shortest path of connections from the player named name1 to the player named name2 as a list of
+        vertices, or None if there is no path. Uses a bidirectional breadth-first search over vertex ids, always
+        expanding the smaller of the two frontiers by one full level.
+        """
+        source, target = self.vertices.get(name1), self.vertices.get(name2)
+        if source is None or target is None:
+            return None
+        if source is target:
+            return [source]
+
+        offsets, sources = self.get_reverse_adjacency()
+        vertices_by_id = self.vertices_by_id
+        forward_parents, backward_parents = {source.index: -1}, {target.index: -1}
+        forward_frontier, backward_frontier = [source.index], [target.index]
+
+        while forward_frontier and backward_frontier:
+            forward = len(forward_frontier) <= len(backward_frontier)
+            if forward:
+                frontier, parents, other_parents = forward_frontier, forward_parents, backward_parents
+            else:
+                frontier, parents, other_parents = backward_frontier, backward_parents, forward_parents
+            next_frontier = []
+            for vertex_id in frontier:
+                if forward:
+                    candidates = vertices_by_id[vertex_id].neighbour_ids()
+                else:
+                    candidates = sources[offsets[vertex_id]:offsets[vertex_id + 1]]
+
+                for other_id in candidates:
+                    if other_id in parents or vertices_by_id[other_id] is None:
+                        continue
+                    parents[other_id] = vertex_id
+                    # Every level is expanded in full, so the first meeting point gives a shortest path
+                    if other_id in other_parents:
+                        return self.join_path(other_id, forward_parents, backward_parents)
+                    next_frontier.append(other_id)
+
+            if forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+
+        return None
+
+    def join_path(self, meeting_id: int, forward_parents: dict[int, int],
+                  backward_parents: dict[int, int]) -> list[Vertex]:
+        """
+        Return the path through the vertex with id meeting_id found by a bidirectional search, given the parent
+        of every vertex reached from each side (-1 for the start of each side).
+        """
+        path = []
+        vertex_id = meeting_id
+        while vertex_id != -1:
+            path.append(self.vertices_by_id[vertex_id])
+            vertex_id = forward_parents[vertex_id]
+        path.reverse()
+
+        vertex_id = backward_parents[meeting_id]
+        while vertex_id != -1:
+            path.append(self.vertices_by_id[vertex_id])
+            vertex_id = backward_parents[vertex_id]
+        return path
+
+    def shortest_paths(self, pairs: Iterable[tuple[str, str]]) -> list[Optional[list[Vertex]]]:
+        """
+        Given (player, other player) name pairs, return a shortest path for each pair in the same order, or None
+        for pairs with no path. Pairs that share a starting player are answered by a single breadth-first search
+        from that player, which stops once all of its targets are reached.
+        """
+        pairs = list(pairs)
+        targets_by_source = {}
+        for name1, name2 in pairs:
+            if name1 in self.vertices and name2 in self.vertices:
+                targets_by_source.setdefault(name1, set()).add(self.vertices[name2].index)
+
+        paths = {}
+        for name1, target_ids in targets_by_source.items():
+            parents = self.breadth_first_search(self.vertices[name1].index, target_ids=target_ids)
+            for target_id in target_ids:
+                paths[(name1, self.vertices_by_id[target_id].name)] = self.trace_path(target_id, parents)
+
+        return [paths.get(pair) for pair in pairs]
+
+    def k_hop_neighbours(self, name1: str, k: int) -> dict[str, int]:
+        """
+        Return every player within k connections of the player named name1 (excluding that player), mapped to
+        the number of connections between them.
+        """
+        if name1 not in self.vertices:
+            return {}
+        depths = {}
+        self.breadth_first_search(self.vertices[name1].index, max_depth=k, depths=depths)
+        return {self.vertices_by_id[vertex_id].name: depth for vertex_id, depth in depths.items() if depth > 0}
+
+    def breadth_first_search(self, source_id: int, target_ids: Optional[set[int]] = None,
+                             max_depth: Optional[int] = None, depths: Optional[dict[int, int]] = None
+                             ) -> dict[int, int]:
+        """
+        Run a breadth-first search from the vertex with id source_id and return the parent of every vertex reached
+        (-1 for the source). Stops early once every id in target_ids is reached, or after max_depth levels.
+        If depths is given, the number of connections to each vertex reached is stored in it.
+        """
+        vertices_by_id = self.vertices_by_id
+        parents = {source_id: -1}
+        remaining = set(target_ids) - {source_id} if target_ids is not None else None
+        frontier, depth = [source_id], 0
+        if depths is not None:
+            depths[source_id] = 0
+
+        while frontier and (max_depth is None or depth < max_depth) and (remaining is None or remaining):
+            depth += 1
+            next_frontier = []
+            for vertex_id in frontier:
+                for other_id in vertices_by_id[vertex_id].neighbour_ids():
+                    if other_id in parents or vertices_by_id[other_id] is None:
+                        continue
+                    parents[other_id] = vertex_id
+                    next_frontier.append(other_id)
+                    if depths is not None:
+                        depths[other_id] = depth
+                    if remaining is not None:
+                        remaining.discard(other_id)
+            frontier = next_frontier
+
+        return parents
+
+    def trace_path(self, target_id: int, parents: dict[int, int]) -> Optional[list[Vertex]]:
+        """
+        Return the path to the vertex with id target_id from the start of a breadth-first search, given the parent
+        of every vertex it reached, or None if the search did not reach it.
+        """
+        if target_id not in parents:
+            return None
+        path = []
+        while target_id != -1:
+            path.append(self.vertices_by_id[target_id])
+            target_id = parents[target_id]
+        return path[::-1]
 
     def check_winrate_correlation(self) -> float:
         """
@@ -187,10 +569,10 @@ class Graph:
 class Edge:
     """Fill out this docstring"""
     points_towards: Vertex
-    teammate_stats: dict
-    opponent_stats: dict
+    teammate_stats: EdgeStats
+    opponent_stats: EdgeStats
 
-    def __init__(self, points_towards: Vertex, teammate_stats: dict, opponent_stats: dict) -> None:
+    def __init__(self, points_towards: Vertex, teammate_stats: EdgeStats, opponent_stats: EdgeStats) -> None:
         """Initialize an Edge connected to another player"""
         self.points_towards = points_towards
         self.teammate_stats = teammate_stats
@@ -198,12 +580,100 @@ class Edge:
 
     def calculate_player_performance(self) -> float:
         """Calculate how well this player does in revenge matchups compared to their normal value"""
-        if 'w_pct' in self.opponent_stats and 'w_pct' in self.teammate_stats:
-            return abs(float(self.opponent_stats['w_pct']) - float(self.teammate_stats['w_pct']))
+        if self.opponent_stats.w_pct is not None and self.teammate_stats.w_pct is not None:
+            return abs(self.opponent_stats.w_pct - self.teammate_stats.w_pct)
         else:
             return 0.0
 
 
+class EdgeStats:
+    """
+    The stats of a player with or against another player, with the fields of archive/webscraper.parse_player_data
+    parsed once into numbers. Counts (games, wins, ...) are ints and percentages (w_pct, ...) are floats, or None
+    if they were not scraped.
+    """
+    __slots__ = EDGE_COUNT_FIELDS + EDGE_PCT_FIELDS
+    games: int
+    wins: int
+    losses: int
+    w_pct: Optional[float]
+    g_reg: int
+    w_reg: int
+    l_reg: int
+    w_pct_reg: Optional[float]
+    g_ply: int
+    w_ply: int
+    l_ply: int
+    w_pct_ply: Optional[float]
+
+    def __init__(self, stats: dict) -> None:
+        """Initialize the stats from a dictionary of strings (as scraped) or numbers (as stored in a snapshot)"""
+        # Spelled out rather than looped over with setattr, since this runs for every edge at load time
+        get = stats.get
+        self.games = int(get('games') or 0)
+        self.wins = int(get('wins') or 0)
+        self.losses = int(get('losses') or 0)
+        self.g_reg = int(get('g_reg') or 0)
+        self.w_reg = int(get('w_reg') or 0)
+        self.l_reg = int(get('l_reg') or 0)
+        self.g_ply = int(get('g_ply') or 0)
+        self.w_ply = int(get('w_ply') or 0)
+        self.l_ply = int(get('l_ply') or 0)
+        w_pct, w_pct_reg, w_pct_ply = get('w_pct'), get('w_pct_reg'), get('w_pct_ply')
+        self.w_pct = float(w_pct) if w_pct not in ('', None) else None
+        self.w_pct_reg = float(w_pct_reg) if w_pct_reg not in ('', None) else None
+        self.w_pct_ply = float(w_pct_ply) if w_pct_ply not in ('', None) else None
+
+
+class SnapshotVertex(Vertex):
+    """
+    A vertex whose edges live in the graph's snapshot instead of on the vertex. They are loaded into the graph's
+    bounded cache of edges (Graph.get_snapshot_edges) when neighbours or get_edge is first used.
+    """
+    graph: Graph
+    index: int
+
+    def __init__(self, player_name: str, graph: Graph, index: int) -> None:
+        """Initialize a vertex for the player at the given index of graph.snapshot"""
+        self.name = player_name
+        self.expanded_data = None
+        self.avg_teammate_winrate = None
+        self.avg_opponent_winrate = None
+        self.graph = graph
+        self.index = index
+
+    @property
+    def neighbours(self) -> set[Edge]:
+        """Return the edges to every neighbour of this player that is in the graph"""
+        return self.graph.get_snapshot_edges(self)[0]
+
+    def neighbour_ids(self) -> Iterable[int]:
+        """
+        Return the graph ids of the players this player has edges to, straight from the snapshot. This may include
+        players that are not in the graph, whose entry in Graph.vertices_by_id is None.
+        """
+        edge_range = self.graph.snapshot.edge_range(self.index)
+        return self.graph.snapshot.columns["edge_targets"][edge_range.start:edge_range.stop]
+
+    def neighbour_vertices(self) -> Iterable[Vertex]:
+        """
+        Return the vertices of the players this player has edges to that are in the graph, found through
+        Graph.vertices_by_id, so no edges are loaded from the snapshot.
+        """
+        vertices_by_id = self.graph.vertices_by_id
+        return [vertices_by_id[target] for target in self.neighbour_ids() if vertices_by_id[target] is not None]
+
+    def get_edge(self, name1: str) -> Optional[Edge]:
+        """
+        Return the edge from this player to the player named name1, or None if they are not adjacent.
+        """
+        return self.graph.get_snapshot_edges(self)[1].get(name1)
+
+    def add_edge(self, edge: Edge) -> None:
+        """Snapshot vertices are read-only, since their edges are stored in the snapshot"""
+        raise TypeError("Edges cannot be added to a snapshot vertex")
+
+
 class PlayerData:
     """Fill out this docstring"""
     seasons: list[str]
@@ -0,0 +1,120 @@
+"""
+Builds active_players.json from the scraped datasets: for every active player in players_stats.json, the players
+they have both played with (players_played_with.json) and against (players_played_against.json), along with the
+stats of each. Run with: python cleaning.py
+
+This replaces archive/datacleaning.py, which loaded both scraped files whole and searched a player's teammate and
+opponent lists once for every candidate name. Here each player's lists are indexed by name and joined in a
+single pass, and both files are parsed and the output written one player at a time, so only the players read
+from one file but not yet from the other are held in memory. The scraper writes both files in the same order,
+so that is usually only a handful of players.
+"""
+import json
+import os
+from typing import Iterable, Iterator, Optional, TextIO
+from loading import iter_json_object
+
+STATS_FILE = "players_stats.json"
+PLAYED_WITH_FILE = "players_played_with.json"
+PLAYED_AGAINST_FILE = "players_played_against.json"
+OUTPUT_FILE = "active_players.json"
+
+
+def read_active_players(f: TextIO) -> list[str]:
+    """Return the names of the active players in the players_stats.json file f, in the order they appear."""
+    return [name for name, info, _ in iter_json_object(f) if isinstance(info, dict) and info.get("active")]
+
+
+def index_by_name(entries: Iterable[Optional[dict]]) -> dict[str, dict]:
+    """
+    Return the stats entries of a teammate or opponent list, keyed by player name. Only the first entry of each
+    name is kept, and rows the scraper could not parse (None) are skipped.
+    """
+    index = {}
+    for entry in entries:
+        if entry and entry["name"] not in index:
+            index[entry["name"]] = entry
+    return index
+
+
+def join_connections(teammates: Iterable[Optional[dict]], opponents: Iterable[Optional[dict]]) -> list[dict]:
+    """
+    Return the connections of a player: one entry for every player found in both their teammate and opponent
+    lists, in the order of the opponent list.
+    """
+    teammate_index = index_by_name(teammates)
+    return [
+        {"name": name, "teammate_stats": teammate_index[name], "opponent_stats": opponent_stats}
+        for name, opponent_stats in index_by_name(opponents).items()
+        if name in teammate_index
+    ]
+
+
+def iter_cleaned_players(active_players: Iterable[str], played_with: Iterator[tuple[str, list]],
+                         played_against: Iterator[tuple[str, list]]) -> Iterator[tuple[str, list[dict]]]:
+    """
+    Yield (name, connections) for every active player, joining the (name, teammates) pairs of played_with with
+    the (name, opponents) pairs of played_against as they are read. Both are read a player at a time, in
+    step with each other. A player is yielded as soon as both of their lists have been read; active players
+    missing from either dataset are yielded last, with no connections.
+    """
+    remaining = dict.fromkeys(active_players)
+    pending = ({}, {})  # the lists read from played_with and played_against whose other half is not read yet
+    sources = [played_with, played_against]
+
+    while any(sources):
+        for side, source in enumerate(sources):
+            if source is None:
+                continue
+            member = next(source, None)
+            if member is None:
+                sources[side] = None
+                continue
+
+            name, entries = member
+            if name not in remaining:
+                continue
+            other = pending[1 - side]
+            if name not in other:
+                pending[side][name] = entries
+                continue
+
+            teammates, opponents = (entries, other.pop(name)) if side == 0 else (other.pop(name), entries)
+            del remaining[name]
+            yield name, join_connections(teammates, opponents)
+
+    for name in remaining:
+        yield name, []
+
+
+def write_json_object(f: TextIO, members: Iterable[tuple[str, object]]) -> int:
+    """
+    Write the (key, value) pairs to f as a JSON object, one member per line, and return how many were written.
+    """
+    count = 0
+    f.write("{")
+    for key, value in members:
+        f.write(",\n" if count else "\n")
+        f.write(f"{json.dumps(key)}: {json.dumps(value)}")
+        count += 1
+    f.write("\n}\n")
+    return count
+
+
+def clean_datasets(directory: str = ".", output: str = OUTPUT_FILE) -> int:
+    """
+    Build the output file from the three scraped datasets in directory, and return how many players it holds.
+    """
+    with open(os.path.join(directory, STATS_FILE), "r", encoding="utf-8") as f:
+        active_players = read_active_players(f)
+
+    with open(os.path.join(directory, PLAYED_WITH_FILE), "r", encoding="utf-8") as with_file, \
+            open(os.path.join(directory, PLAYED_AGAINST_FILE), "r", encoding="utf-8") as against_file, \
+            open(os.path.join(directory, output), "w", encoding="utf-8") as out:
+        played_with = ((name, entries) for name, entries, _ in iter_json_object(with_file))
+        played_against = ((name, entries) for name, entries, _ in iter_json_object(against_file))
+        return write_json_object(out, iter_cleaned_players(active_players, played_with, played_against))
+
+
+if __name__ == "__main__":
+    print(f"Wrote {clean_datasets()} players to {OUTPUT_FILE}")
@@ -5,11 +5,14 @@ display boxes.
 
 import random
 import math
+import time
+from typing import Callable, Generator, Optional
+import numpy as np
 import pygame
 
 
 import pygame.camera
-from classes import Graph
+from classes import Edge, Graph, Vertex
 from display_objects import (
     PlayerNode,
     PositionalData,
@@ -19,7 +22,41 @@ from display_objects import (
     StatList,
     WinrateMetrics,
     HeadToHeadMetrics,
+    text_cache,
 )
+from profiling import profiler
+
+# The fill colour of the transparent parts of the opponent box's edge layer, which no line is drawn in
+EDGE_LAYER_COLOURKEY = (255, 0, 255)
+
+# The most connections shown in the opponent box at once. Players with more are shown a page at a time.
+OPPONENT_PAGE_SIZE = 50
+
+# How long each idle frame may spend laying out the next page of the opponent box, in seconds
+PREPARE_SLICE_SECONDS = 0.002
+
+# About the most of a box that the Poisson-disk sampler covers with non-overlapping equal circles before no more fit,
+# used to tell whether a layout can fit before sampling it
+RANDOM_PACKING_DENSITY = 0.6
+
+# A layout in progress, which yields after each step and returns the (points, radius) of get_points
+LayoutSteps = Generator[None, None, tuple[list[tuple[int, int]], int]]
+
+
+def run_steps(steps: Generator[None, None, object]) -> object:
+    """Run the generator steps to the end and return its return value."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+def games_shared(edge: Edge) -> int:
+    """
+    Return how many games the two players of the edge played together or against each other.
+    """
+    return edge.teammate_stats.games + edge.opponent_stats.games
 
 
 class DisplayBox:
@@ -31,21 +68,50 @@ class DisplayBox:
     positional_data: PositionalData
     screen: pygame.display
     camera: Camera
+    dirty: bool  # whether anything inside of the box changed since it was last rendered
+
+    current_player_nodes: dict[str, PlayerNode]
+    highlighted_node: Optional[PlayerNode]
+
+    # The (left, top) positions and radii of current_player_nodes in order, before the camera is applied. The
+    # camera is applied to all of them at once into node_rects, the (left, top, width, height) of each node on
+    # screen, which the nodes are drawn and hit-tested from. node_transform_zoom is the zoom node_rects were
+    # computed with (None if they need to be computed again). ordered_nodes holds the nodes in the same order.
+    ordered_nodes: list[PlayerNode]
+    node_positions: np.ndarray
+    node_radii: np.ndarray
+    node_rects: np.ndarray
+    node_transform_zoom: Optional[float]
+
+    # A uniform grid over node_rects, holding the index of each node in the cells it covers, so only the nodes
+    # in the cell under the mouse are hit-tested. It is rebuilt after the nodes are regenerated or transformed
+    # (node_index is set to None).
+    node_index: Optional[dict[tuple[int, int], list[int]]]
+    node_index_cell_size: int
 
     def __init__(self, screen: pygame.display, positional_data: PositionalData) -> None:
 
         self.screen = screen
         self.camera = Camera()
         self.positional_data = positional_data
+        self.dirty = True
+        self.current_player_nodes = {}
+        self.highlighted_node = None
+        self.ordered_nodes = []
+        self.node_positions = np.zeros((0, 2))
+        self.node_radii = np.zeros(0)
+        self.node_rects = np.zeros((0, 4), dtype=int)
+        self.node_transform_zoom = None
+        self.node_index = None
+        self.node_index_cell_size = 1
 
         # Create a pygame.Rect representing the box bounds
         self.box = pygame.Rect(self.positional_data.get_rect_positional_data())
 
-    def check_interaction(self, events: list[pygame.event.Event]) -> None:
+    def check_interaction(self, events: list[pygame.event.Event], point: tuple[int, int]) -> None:
         """
-        Handle mouse inputs and such...
+        Handle mouse inputs and such, given the events and mouse position of the current frame.
         """
-        point = pygame.mouse.get_pos()
         collide = self.box.collidepoint(point)
         if not collide:
             return None
@@ -54,36 +120,220 @@ class DisplayBox:
             if event.type == pygame.MOUSEWHEEL:
                 if event.y > 0:  # Scroll up (zoom in)
                     self.camera.zoom_in()
+                    self.dirty = True
                 elif event.y < 0:  # Scroll down (zoom out)
                     self.camera.zoom_out()
+                    self.dirty = True
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                # A left click changes which node is highlighted
+                self.dirty = True
 
     def render(self) -> None:
         """Render itself, and all of the elements inside of it."""
         pygame.draw.rect(self.screen, (0, 0, 0), self.box, width=2, border_radius=2)
 
+    def clear_nodes(self) -> None:
+        """
+        Remove every node from the box, along with the highlight and the node index.
+        """
+        self.current_player_nodes.clear()
+        self.highlighted_node = None
+        self.update_node_arrays()
+
+    def update_node_arrays(self) -> None:
+        """
+        Copy current_player_nodes into ordered_nodes, and their positions and radii into node_positions and
+        node_radii. Call whenever the nodes are regenerated.
+        """
+        nodes = self.ordered_nodes = list(self.current_player_nodes.values())
+        self.node_positions = np.array(
+            [(node.positional_data.left, node.positional_data.top) for node in nodes], dtype=float
+        ).reshape(-1, 2)
+        self.node_radii = np.array([node.positional_data.width for node in nodes], dtype=float)
+        self.node_transform_zoom = None
+        self.node_index = None
+
+    def transform_nodes(self) -> None:
+        """
+        Apply the camera to every node at once into node_rects, as PlayerNode.scale_and_transform does to one
+        node. Nothing is recomputed unless the zoom changed since the nodes were last transformed.
+        """
+        zoom = self.camera.zoom
+        if zoom == self.node_transform_zoom:
+            return
+
+        sizes = self.node_radii * zoom
+        self.node_rects = np.rint(np.column_stack((self.node_positions, sizes, sizes))).astype(int).reshape(-1, 4)
+        self.node_transform_zoom = zoom
+        self.node_index = None
+
+    def node_centers(self) -> np.ndarray:
+        """Return the (x, y) center of every node on screen, the way pygame.Rect.center rounds it."""
+        return self.node_rects[:, :2] + self.node_rects[:, 2:] // 2
+
+    def render_nodes(self) -> None:
+        """Draw every node where transform_nodes placed it."""
+        centers, sizes = self.node_centers().tolist(), self.node_rects[:, 2].tolist()
+        for player_node, center, size in zip(self.ordered_nodes, centers, sizes):
+            player_node.render(center, size)
+
+    def build_node_index(self) -> None:
+        """
+        Bucket node_rects into a grid of cells as large as the largest node, so each node is added to at most
+        four cells.
+        """
+        rects = self.node_rects
+        cell_size = max(int(rects[:, 2].max(initial=0)), 1)
+        first_cells = rects[:, :2] // cell_size
+        last_cells = (rects[:, :2] + rects[:, 2:] - 1) // cell_size
+
+        node_index = {}
+        for index, (first_x, first_y, last_x, last_y) in enumerate(np.hstack((first_cells, last_cells)).tolist()):
+            for cell_x in range(first_x, last_x + 1):
+                for cell_y in range(first_y, last_y + 1):
+                    node_index.setdefault((cell_x, cell_y), []).append(index)
+
+        self.node_index = node_index
+        self.node_index_cell_size = cell_size
+
+    def find_node_at(self, point: tuple[int, int]) -> Optional[PlayerNode]:
+        """
+        Return the node under the given point, or None if there is not one. If nodes overlap, the one drawn last
+        (on top) is returned.
+        """
+        self.transform_nodes()
+        if self.node_index is None:
+            self.build_node_index()
+
+        cell = (point[0] // self.node_index_cell_size, point[1] // self.node_index_cell_size)
+        found = None
+        for index in self.node_index.get(cell, []):
+            left, top, width, height = self.node_rects[index].tolist()
+            if left <= point[0] < left + width and top <= point[1] < top + height:
+                found = index
+        return None if found is None else self.ordered_nodes[found]
+
+    def check_node_clicked(self, events: list[pygame.event.Event], point: tuple[int, int]) -> Optional[PlayerNode]:
+        """
+        If the box was left clicked this frame, highlight the node under the mouse instead of the previously
+        highlighted one and return it, or return None if the click missed every node.
+        """
+        if not any(event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 for event in events):
+            return None
+
+        player_node = self.find_node_at(point)
+        if self.highlighted_node is not None:
+            self.highlighted_node.is_highlighted = False
+        if player_node is not None:
+            player_node.is_highlighted = True
+        self.highlighted_node = player_node
+        return player_node
+
     def is_valid_point(
         self,
         new_point: tuple[int, int],
-        existing_points: list[tuple[int, int]],
+        grid: dict[tuple[int, int], tuple[int, int]],
+        cell_size: float,
         min_distance: int,
     ) -> bool:
         """
-        Given a series of points already generated, return if the new point is outside of the minimum distance
-        from all of the points.
+        Given a grid of the points already generated, bucketed into cells of cell_size (see poisson_disk_sample),
+        return if the new point is outside of the minimum distance from all of the points. Only the cells that
+        could hold a point closer than min_distance are checked.
         """
-        for point in existing_points:
-            if math.dist(new_point, point) < min_distance:
-                return False
+        cell_x, cell_y = int(new_point[0] // cell_size), int(new_point[1] // cell_size)
+        for dx in range(-2, 3):
+            for dy in range(-2, 3):
+                point = grid.get((cell_x + dx, cell_y + dy))
+                if point is not None and math.dist(new_point, point) < min_distance:
+                    return False
         return True
 
+    def poisson_disk_capacity(self, bounds: tuple[int, int, int, int], min_distance: int) -> int:
+        """
+        Given bounds (x_min, y_min, x_max, y_max), return about how many points poisson_disk_sample places inside
+        of them at least min_distance apart. Each point claims a circle of diameter min_distance, which may reach
+        half of min_distance past the bounds, and the circles cover RANDOM_PACKING_DENSITY of the area they reach.
+        """
+        x_min, y_min, x_max, y_max = bounds
+        if x_max < x_min or y_max < y_min:
+            return 0
+
+        reach_area = (x_max - x_min + min_distance) * (y_max - y_min + min_distance)
+        return int(RANDOM_PACKING_DENSITY * reach_area / (math.pi * (min_distance / 2) ** 2))
+
+    def poisson_disk_sample(
+        self, bounds: tuple[int, int, int, int], min_distance: int, attempts: int = 30,
+        max_points: Optional[int] = None
+    ) -> list[tuple[int, int]]:
+        """
+        Given bounds (x_min, y_min, x_max, y_max), randomly place as many points inside of them as will fit with
+        every pair at least min_distance apart, using Bridson's Poisson-disk sampling, stopping once max_points
+        are placed if it is given. Points are bucketed into a grid of cells too small to hold two points, so each
+        candidate is only compared against its neighbouring cells and the running time is linear in the number of
+        points placed.
+        """
+        return run_steps(self.poisson_disk_steps(bounds, min_distance, attempts, max_points))
+
+    def poisson_disk_steps(
+        self, bounds: tuple[int, int, int, int], min_distance: int, attempts: int = 30,
+        max_points: Optional[int] = None
+    ) -> Generator[None, None, list[tuple[int, int]]]:
+        """
+        Run poisson_disk_sample, yielding after each point is tried as the centre of new points, and return the
+        points placed.
+        """
+        x_min, y_min, x_max, y_max = bounds
+        if x_max < x_min or y_max < y_min:
+            return []
+
+        cell_size = min_distance / math.sqrt(2)
+        first_point = (random.randint(x_min, x_max), random.randint(y_min, y_max))
+        points = [first_point]
+        grid = {(int(first_point[0] // cell_size), int(first_point[1] // cell_size)): first_point}
+        active_points = [first_point]
+
+        while active_points and (max_points is None or len(points) < max_points):
+            index = random.randrange(len(active_points))
+            active_x, active_y = active_points[index]
+            for _ in range(attempts):
+                # Try a random point just outside min_distance. Bridson's usual ring out to twice min_distance
+                # packs the points too loosely to fit as many players as rejection sampling did
+                angle = random.uniform(0, 2 * math.pi)
+                distance = random.uniform(min_distance, 1.05 * min_distance)
+                new_point = (
+                    round(active_x + distance * math.cos(angle)),
+                    round(active_y + distance * math.sin(angle)),
+                )
+                if not (x_min <= new_point[0] <= x_max and y_min <= new_point[1] <= y_max):
+                    continue
+                if self.is_valid_point(new_point, grid, cell_size, min_distance):
+                    points.append(new_point)
+                    active_points.append(new_point)
+                    grid[(int(new_point[0] // cell_size), int(new_point[1] // cell_size))] = new_point
+                    break
+            else:
+                # No room is left around this point
+                active_points[index] = active_points[-1]
+                active_points.pop()
+            yield
+
+        return points
+
     def get_points(self, num_of_players: int) -> tuple[list[tuple[int, int]], int]:
         """
         Given the bounds of the box and a certain number of circles to generate,
         randomly generate the placement of all of the circles and
-        the radius to set them to. If a random arrangement cannot be found within a
-        reasonable amount of time,
+        the radius to set them to. If the circles do not all fit in a random arrangement,
         return an ordered arrangement of the circles instead.
         """
+        return run_steps(self.get_points_steps(num_of_players))
+
+    def get_points_steps(self, num_of_players: int) -> LayoutSteps:
+        """
+        Run get_points a step of the Poisson-disk sampling at a time, yielding after each step, and return the
+        points and radius.
+        """
         if num_of_players < 1:
             return [], 0
 
@@ -103,18 +353,16 @@ class DisplayBox:
         default_points = self.generate_default_points(
             num_of_players, (x_min, y_min, x_max), min_spacing
         )
-        randomized_points = []
-        count = 0
-
-        while (
-            len(randomized_points) < num_of_players and count < 50000
-        ):  # reasonable runtime boudn on the while loop
-            new_point = (random.randint(x_min, x_max), random.randint(y_min, y_max))
-            if self.is_valid_point(new_point, randomized_points, min_spacing + 20):
-                randomized_points.append(new_point)
-            count += 1
-
-        if len(randomized_points) == num_of_players:
+        bounds = (x_min, y_min, x_max, y_max)
+        if self.poisson_disk_capacity(bounds, min_spacing + 20) < num_of_players:
+            # Sampling would run until the box is full and still come up short
+            return default_points, radius
+
+        randomized_points = yield from self.poisson_disk_steps(
+            bounds, min_spacing + 20, max_points=num_of_players
+        )
+
+        if len(randomized_points) >= num_of_players:
             return randomized_points, radius
         else:
             return default_points, radius
@@ -146,7 +394,6 @@ class TeamBox(DisplayBox):
     Inherits from DisplayBox for all of the base methods.
     """
 
-    current_player_nodes: dict[str, PlayerNode]
     graph: Graph
 
     sidebar: "SideBar"
@@ -161,7 +408,6 @@ class TeamBox(DisplayBox):
 
         super().__init__(screen, positional_data)
 
-        self.current_player_nodes = {}
         self.graph = graph
 
     def add_references(self, sidebar: "SideBar", opponentbox: "OpponentBox") -> None:
@@ -169,39 +415,32 @@ class TeamBox(DisplayBox):
         self.sidebar = sidebar
         self.opponentbox = opponentbox
 
-    def check_interaction(self, events: list[pygame.event.Event]) -> None:
+    def check_interaction(self, events: list[pygame.event.Event], point: tuple[int, int]) -> None:
         """
         Handle interaction with thie box. When an element inside of the box is clicked, update
         the opponent box and the sidebar displays accordingly.
         """
-        super().check_interaction(events)
-        point = pygame.mouse.get_pos()
+        super().check_interaction(events, point)
         collide = self.box.collidepoint(point)
         if collide:
-            for node_name in self.current_player_nodes:
-                result = self.current_player_nodes[node_name].check_interaction(events)
-                if result:
+            result = self.check_node_clicked(events, point)
+            if result:
+                with profiler.section("OpponentBox.generate_nodes"):
                     self.opponentbox.generate_nodes(result)
-                    self.sidebar.update_current_player(result)
+                self.sidebar.update_current_player(result)
 
     def render(self) -> None:
         """Render itself, and all of the elements inside of it."""
         super().render()
         # pygame.draw.rect(self.screen, (0, 0, 0), self.teambox, width=2, border_radius=2)
-        for node_name in self.current_player_nodes:
-            player_node = self.current_player_nodes[node_name]
-            player_node.scale_and_transform()
-            player_node.render()
+        self.transform_nodes()
+        self.render_nodes()
 
     def generate_nodes(self, team: str) -> None:
 
-        self.current_player_nodes.clear()
-        players = []
-
-        for player_name in self.graph.vertices:
-            player_vertex = self.graph.vertices[player_name]
-            if team == player_vertex.expanded_data.last_team:
-                players.append((player_name, player_vertex))
+        self.clear_nodes()
+        self.dirty = True
+        players = [(player_vertex.name, player_vertex) for player_vertex in self.graph.get_team_roster(team)]
 
         circle_points, radius = super().get_points(len(players))
         index = 0
@@ -218,6 +457,7 @@ class TeamBox(DisplayBox):
                 player[1],
             )
             index += 1
+        self.update_node_arrays()
 
 
 class OpponentBox(DisplayBox):
@@ -227,12 +467,26 @@ class OpponentBox(DisplayBox):
     Inherits from the displaybox class for basic functionality.
     """
 
-    current_player_nodes: dict[str, PlayerNode]
     graph: Graph
 
     reference_player: PlayerNode
     sidebar: "SideBar"
 
+    # Every connection line is drawn at once onto edge_layer, which is placed at edge_layer_position and reused
+    # until the reference player, its position on screen or the camera changes (edge_layer_key).
+    edge_layer: Optional[pygame.Surface]
+    edge_layer_position: tuple[int, int]
+    edge_layer_key: Optional[tuple[PlayerNode, tuple[int, int], float]]
+
+    # The connections of the reference player are sorted by page_metric, highest first, and only the nodes of the
+    # current page are created. The layout of the page after it is computed ahead of time as (page, points, radius),
+    # a slice at a time over idle frames, with next_page_steps holding the (page, layout) in progress.
+    page_metric: Callable[[Edge], float]
+    sorted_opponents: list[Vertex]
+    page: int
+    next_page_layout: Optional[tuple[int, list[tuple[int, int]], int]]
+    next_page_steps: Optional[tuple[int, LayoutSteps]]
+
     def __init__(
         self,
         positional_data: PositionalData,
@@ -242,39 +496,75 @@ class OpponentBox(DisplayBox):
 
         super().__init__(screen, positional_data)
 
-        self.current_player_nodes = {}
         self.graph = graph
         self.reference_player = None
-
-    def check_interaction(self, events: list[pygame.event.Event]) -> None:
+        self.edge_layer = None
+        self.edge_layer_position = (0, 0)
+        self.edge_layer_key = None
+        self.page_metric = games_shared
+        self.sorted_opponents = []
+        self.page = 0
+        self.next_page_layout = None
+        self.next_page_steps = None
+
+    def check_interaction(self, events: list[pygame.event.Event], point: tuple[int, int]) -> None:
         """
-        Handle mouse inputs and such...
+        Handle mouse inputs and such, given the events and mouse position of the current frame.
         """
-        super().check_interaction(events)
-        point = pygame.mouse.get_pos()
+        super().check_interaction(events, point)
         collide = self.box.collidepoint(point)
         if collide:
-            for (
-                node_name
-            ) in (
-                self.current_player_nodes
-            ):  # handle when a node gets clicked on, update opponent box and sidebar
-                result = self.current_player_nodes[node_name].check_interaction(events)
-                if result:
-                    self.sidebar.update_opponent_player(result)
+            # handle when a node gets clicked on, update opponent box and sidebar
+            result = self.check_node_clicked(events, point)
+            if result:
+                self.sidebar.update_opponent_player(result)
 
     def render(self) -> None:
         """Render itself, and all of the elements inside of it."""
         super().render()
-        for node_name in self.current_player_nodes:
-            player_node = self.current_player_nodes[node_name]
-            if self.reference_player is not None:
-                player_node.render_connection(self.reference_player)
+        self.transform_nodes()
+
+        if self.reference_player is not None and self.current_player_nodes:
+            self.reference_player.scale_and_transform()
+            self.render_connections()
 
-        for node_name in self.current_player_nodes:
-            player_node = self.current_player_nodes[node_name]
-            player_node.scale_and_transform()
-            player_node.render()
+        self.render_nodes()
+
+    def render_connections(self) -> None:
+        """
+        Draw the lines between the reference player and every node in the box, redrawing the edge layer first
+        if the reference player has moved or the camera has zoomed since it was last drawn.
+        """
+        reference_center = self.reference_player.object.center
+        key = (self.reference_player, reference_center, self.camera.zoom)
+        if self.edge_layer is None or self.edge_layer_key != key:
+            self.build_edge_layer(reference_center)
+            self.edge_layer_key = key
+        self.screen.blit(self.edge_layer, self.edge_layer_position)
+
+    def build_edge_layer(self, reference_center: tuple[int, int]) -> None:
+        """
+        Draw a line from reference_center to every node onto a new transparent edge layer, just big enough to hold
+        all of them. The lines are drawn in one call as a single path that returns to the reference player after
+        each node.
+        """
+        endpoints = np.vstack((self.node_centers(), reference_center))
+        left, top = endpoints.min(axis=0).tolist()
+        right, bottom = endpoints.max(axis=0).tolist()
+        size = (right - left + 1, bottom - top + 1)
+
+        self.edge_layer = pygame.Surface(size, 0, self.screen)
+        self.edge_layer.fill(EDGE_LAYER_COLOURKEY)
+        self.edge_layer.set_colorkey(EDGE_LAYER_COLOURKEY, pygame.RLEACCEL)
+        self.edge_layer_position = (left, top)
+
+        center = (reference_center[0] - left, reference_center[1] - top)
+        path = []
+        for x, y in (endpoints[:-1] - (left, top)).tolist():
+            path.append(center)
+            path.append((x, y))
+        path.append(center)
+        pygame.draw.lines(self.edge_layer, (200, 200, 200), False, path, 1)
 
     def add_references(self, sidebar: "SideBar") -> None:
         """Add references to the other major objects."""
@@ -284,21 +574,67 @@ class OpponentBox(DisplayBox):
         """
         Refresh the display to show nothing. Called when the user swaps to a new team.
         """
-        self.current_player_nodes.clear()
+        self.clear_nodes()
         self.reference_player = None
+        self.sorted_opponents = []
+        self.next_page_layout = None
+        self.next_page_steps = None
+        self.edge_layer = None
+        self.dirty = True
+
+    def page_count(self) -> int:
+        """Return the number of pages the connections of the reference player are split into."""
+        return max(1, math.ceil(len(self.sorted_opponents) / OPPONENT_PAGE_SIZE))
+
+    def get_page(self, page: int) -> list[Vertex]:
+        """Return the connections of the reference player shown on the given page."""
+        return self.sorted_opponents[page * OPPONENT_PAGE_SIZE:(page + 1) * OPPONENT_PAGE_SIZE]
 
     def generate_nodes(self, player: PlayerNode) -> None:
         """
-        Given a player node, generate all of their connected nodes in the opponent box.
+        Given a player node, generate the nodes of the first page of their connections in the opponent box.
+        If the player is already shown and has more than one page, show their next page instead.
         """
-        self.current_player_nodes.clear()
-        self.reference_player = player
+        if player is self.reference_player and self.page_count() > 1:
+            self.page = (self.page + 1) % self.page_count()
+        else:
+            self.sort_connections(player)
+            self.page = 0
+        self.show_page(player)
 
-        opponents_to_generate = []
-        for edge in player.player_vertex.neighbours:
-            opponents_to_generate.append(edge.points_towards)
+    def reload_connections(self) -> None:
+        """
+        Sort the connections of the reference player again and recreate the nodes of the current page, keeping
+        the page if it still exists. Called when edges of the reference player are added after it is shown.
+        """
+        if self.reference_player is None:
+            return
+        self.sort_connections(self.reference_player)
+        self.page = min(self.page, self.page_count() - 1)
+        self.show_page(self.reference_player)
+
+    def sort_connections(self, player: PlayerNode) -> None:
+        """Sort the connections of player by page_metric, forgetting any page laid out ahead of time."""
+        edges = sorted(player.player_vertex.neighbours,
+                       key=lambda edge: (-self.page_metric(edge), edge.points_towards.name))
+        self.sorted_opponents = [edge.points_towards for edge in edges]
+        self.next_page_layout = None
+        self.next_page_steps = None
+
+    def show_page(self, player: PlayerNode) -> None:
+        """Replace the nodes in the box with those of the current page of the connections of player."""
+        self.clear_nodes()
+        self.reference_player = player
+        self.edge_layer = None
+        self.dirty = True
 
-        circle_points, radius = super().get_points(len(opponents_to_generate))
+        opponents_to_generate = self.get_page(self.page)
+        if self.next_page_layout is not None and self.next_page_layout[0] == self.page:
+            _, circle_points, radius = self.next_page_layout
+        else:
+            circle_points, radius = super().get_points(len(opponents_to_generate))
+        self.next_page_layout = None
+        self.next_page_steps = None
         index = 0
 
         for opponent in opponents_to_generate:
@@ -314,6 +650,29 @@ class OpponentBox(DisplayBox):
                 opponent,
             )
             index += 1
+        self.update_node_arrays()
+
+    def prepare_next_page(self, budget: float = PREPARE_SLICE_SECONDS) -> None:
+        """
+        Lay out the page after the current one ahead of time, so showing it only has to create its nodes.
+        Called when a frame has nothing to redraw, and runs the layout for about budget seconds each time, so
+        it is spread over several idle frames instead of stalling one.
+        """
+        if self.reference_player is None or self.next_page_layout is not None or self.page_count() == 1:
+            return
+        if self.next_page_steps is None:
+            next_page = (self.page + 1) % self.page_count()
+            self.next_page_steps = (next_page, super().get_points_steps(len(self.get_page(next_page))))
+
+        next_page, steps = self.next_page_steps
+        deadline = time.perf_counter() + budget
+        try:
+            while time.perf_counter() < deadline:
+                next(steps)
+        except StopIteration as stop:
+            circle_points, radius = stop.value
+            self.next_page_layout = (next_page, circle_points, radius)
+            self.next_page_steps = None
 
 
 class SideBar:
@@ -331,6 +690,14 @@ class SideBar:
 
     team_buttons: list[TeamButton]
     stat_displays: list[StatList, WinrateMetrics, HeadToHeadMetrics]
+    dirty: bool  # whether the sidebar needs to be drawn to the screen again
+    stats_dirty: bool  # whether any of the stat displays changed since the layer was last composed
+
+    # The panel, header and team buttons never change, so they are drawn once onto static_layer. The stat displays
+    # are drawn over a copy of it on layer whenever they change, and each redraw of the sidebar is a single blit.
+    # Every component is positioned relative to the sidebar rather than the window.
+    static_layer: pygame.Surface
+    layer: pygame.Surface
 
     def __init__(self, positional_data: PositionalData, screen: pygame.display) -> None:
         self.positional_data = positional_data
@@ -338,6 +705,10 @@ class SideBar:
         self.screen = screen
         self.team_buttons = []
         self.stat_displays = []
+        self.dirty = True
+        self.stats_dirty = True
+        self.static_layer = pygame.Surface(self.sidebar.size, 0, screen)
+        self.layer = pygame.Surface(self.sidebar.size, 0, screen)
 
     def add_references(self, teambox: TeamBox, opponentbox: OpponentBox) -> None:
         """Maintain references to the other big objects."""
@@ -349,24 +720,24 @@ class SideBar:
         Add all of the components of the sidebar in. Call after all references to
         other objects have been finalized.
         """
-        start_x = self.positional_data.left + 75
-        start_y = self.positional_data.top + 50
+        start_x = 75
+        start_y = 50
         index = 1
         for team in DisplayData().teams:
-            self.team_buttons.append(TeamButton(self.screen, team, start_x, start_y))
+            self.team_buttons.append(TeamButton(self.static_layer, team, start_x, start_y))
             start_x += 120
             if index % 3 == 0:
                 start_y += 30
-                start_x = self.positional_data.left + 75
+                start_x = 75
             index += 1
         # main stat display
         self.stat_displays.append(
             StatList(
-                self.screen,
+                self.layer,
                 PositionalData(
                     (self.positional_data.width - 20) // 2,
                     200,
-                    self.positional_data.left + 10,
+                    10,
                     self.positional_data.height // 2,
                 ),
             )
@@ -374,13 +745,11 @@ class SideBar:
         # opponent stat display
         self.stat_displays.append(
             StatList(
-                self.screen,
+                self.layer,
                 PositionalData(
                     (self.positional_data.width - 20) // 2,
                     200,
-                    self.positional_data.left
-                    + (self.positional_data.width - 20) // 2
-                    + 15,
+                    (self.positional_data.width - 20) // 2 + 15,
                     self.positional_data.height // 2,
                 ),
             )
@@ -388,11 +757,11 @@ class SideBar:
         # overall winrate stat display
         self.stat_displays.append(
             WinrateMetrics(
-                self.screen,
+                self.layer,
                 PositionalData(
                     self.positional_data.width - 20,
                     100,
-                    self.positional_data.left + 10,
+                    10,
                     self.positional_data.height // 2 + 220,
                 ),
             )
@@ -400,47 +769,57 @@ class SideBar:
         # head to head winrate display
         self.stat_displays.append(
             HeadToHeadMetrics(
-                self.screen,
+                self.layer,
                 PositionalData(
                     self.positional_data.width - 20,
                     100,
-                    self.positional_data.left + 10,
+                    10,
                     self.positional_data.height // 2 + 330,
                 ),
             )
         )
+        self.render_static_layer()
 
-    def render(self) -> None:
+    def render_static_layer(self) -> None:
         """
-        Render the sidebar element on screen.
+        Draw the parts of the sidebar that never change, the panel, header and team buttons, onto static_layer.
         """
-        pygame.draw.rect(self.screen, pygame.Color("white"), self.sidebar)
-        team_text_surface = pygame.font.Font(None, size=32).render(
-            "TEAMS", True, (0, 0, 0)
-        )
-        text_position = team_text_surface.get_rect(
-            center=(
-                (self.positional_data.left + self.positional_data.width // 2),
-                self.positional_data.top + 25,
-            )
-        )
-        self.screen.blit(team_text_surface, text_position)
+        self.static_layer.fill(pygame.Color("white"))
+        team_text_surface = text_cache.render("TEAMS", 32, (0, 0, 0))
+        text_position = team_text_surface.get_rect(center=(self.positional_data.width // 2, 25))
+        self.static_layer.blit(team_text_surface, text_position)
         for team_button in self.team_buttons:
             team_button.render()
-        for stat_display in self.stat_displays:
-            stat_display.render()
+        self.stats_dirty = True
 
-    def check_interaction(self, events: list[pygame.event.Event]) -> None:
+    def render(self) -> None:
+        """
+        Render the sidebar element on screen, composing the stat displays over the static layer first if
+        any of them changed.
+        """
+        if self.stats_dirty:
+            self.layer.blit(self.static_layer, (0, 0))
+            for stat_display in self.stat_displays:
+                stat_display.render()
+            self.stats_dirty = False
+        self.screen.blit(self.layer, self.sidebar)
+
+    def check_interaction(self, events: list[pygame.event.Event], mouse_position: tuple[int, int]) -> None:
         """
         Handle interactions with the sidebar by passing each event to the subcomponents inside of the sidebar.
         """
+        mouse_x, mouse_y = mouse_position
+        point = (mouse_x - self.sidebar.left, mouse_y - self.sidebar.top)
         for team_button in self.team_buttons:
-            result = team_button.check_interaction(events)
+            result = team_button.check_interaction(events, point)
             if result:
-                self.teambox.generate_nodes(result)
+                with profiler.section("TeamBox.generate_nodes"):
+                    self.teambox.generate_nodes(result)
                 self.opponentbox.refresh()
                 for stat_display in self.stat_displays:
                     stat_display.refresh()
+                self.dirty = True
+                self.stats_dirty = True
 
     def update_current_player(self, player: PlayerNode) -> None:
         """
@@ -450,6 +829,8 @@ class SideBar:
         self.stat_displays[0].update_current_player(player)
         self.stat_displays[2].update_current_player(player)
         self.stat_displays[3].update_current_player(player)
+        self.dirty = True
+        self.stats_dirty = True
 
     def update_opponent_player(self, player: PlayerNode) -> None:
         """
@@ -458,3 +839,23 @@ class SideBar:
         # only indexes 1, 3 should be updated
         self.stat_displays[1].update_current_player(player)
         self.stat_displays[3].update_current_opponent(player)
+        self.dirty = True
+        self.stats_dirty = True
+
+    def reload_metrics(self, names: set[str]) -> None:
+        """
+        Recompute the winrate and head to head metrics of the displayed players whose names are given, after
+        their edges were added.
+        """
+        winrate_metrics, head_to_head_metrics = self.stat_displays[2], self.stat_displays[3]
+        reloaded = False
+        if winrate_metrics.current_player is not None and winrate_metrics.current_player.player_vertex.name in names:
+            winrate_metrics.update_current_player(winrate_metrics.current_player)
+            reloaded = True
+        if head_to_head_metrics.current_player is not None and head_to_head_metrics.current_opponent is not None \
+                and head_to_head_metrics.current_player.player_vertex.name in names:
+            head_to_head_metrics.update_display()
+            reloaded = True
+        if reloaded:
+            self.dirty = True
+            self.stats_dirty = True
@@ -2,9 +2,10 @@
 A module containing the pygame elements that support the graph visualization. Contains the player nodes,
 stat visualization modules, and supporting classes.
 """
-from typing import Optional
+from collections import OrderedDict
 import pygame
 from classes import Vertex
+from profiling import profiler
 
 
 class PositionalData:
@@ -87,6 +88,7 @@ class DisplayData:
 class Camera:
     """
     A class that supports zooming in and out functionality of the player nodes.
+    Node sizes are scaled by zoom, while their positions stay the same.
     """
     zoom: float
 
@@ -112,6 +114,50 @@ class Camera:
         return
 
 
+class TextCache:
+    """
+    A cache of rendered text shared by every element on screen. Fonts are pooled by size, and rendered text
+    surfaces are kept by (text, size, colour) so each label is only rasterized once instead of every frame.
+    Once max_surfaces surfaces are stored, the least recently used one is dropped.
+    """
+    fonts: dict[int, pygame.font.Font]
+    surfaces: OrderedDict[tuple[str, int, tuple[int, int, int]], pygame.Surface]
+    max_surfaces: int
+
+    def __init__(self, max_surfaces: int = 1024) -> None:
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.max_surfaces = max_surfaces
+
+    def get_font(self, size: int) -> pygame.font.Font:
+        """
+        Return the default font at the given size, creating it the first time that size is used.
+        """
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.Font(None, size=size)
+        return self.fonts[size]
+
+    def render(self, text: str, size: int, colour: tuple[int, int, int]) -> pygame.Surface:
+        """
+        Return a surface with the text rendered (anti-aliased) in the default font at the given size and colour.
+        The returned surface is shared, so it must not be drawn on.
+        """
+        key = (text, size, tuple(colour))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.get_font(size).render(text, True, colour)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_surfaces:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+# The text cache used for all text on screen
+text_cache = TextCache()
+
+
 class PlayerNode:
     """
     a class that represents a player node on the graph. Can be interacted with to reveal more data about the player and
@@ -143,20 +189,24 @@ class PlayerNode:
 
     def scale_and_transform(self) -> None:
         """
-        Scale and transform the object to place it where it should be according to the current camera position and zoom.
+        Scale and transform the object to place it where it should be according to the current camera zoom.
+        The nodes inside of a box are transformed all at once by DisplayBox.transform_nodes instead.
         """
-        self.object.width = self.positional_data.width * self.camera.zoom
-        self.object.height = self.positional_data.width * self.camera.zoom
+        self.object.left = self.positional_data.left
+        self.object.top = self.positional_data.top
+        self.object.width = round(self.positional_data.width * self.camera.zoom)
+        self.object.height = round(self.positional_data.width * self.camera.zoom)
 
-    def render(self) -> None:
+    def render(self, center: tuple[int, int], radius: int) -> None:
         """
-        Render the node in pygame according to the camera zoom and position.
+        Render the node in pygame at the given center and radius, as placed by the camera of its box
+        (see DisplayBox.transform_nodes).
         """
         if self.is_highlighted:
-            pygame.draw.circle(self.screen, (0, 0, 0), self.object.center, self.object.width + 5)
-            pygame.draw.circle(self.screen, self.color, self.object.center, self.object.width)
+            pygame.draw.circle(self.screen, (0, 0, 0), center, radius + 5)
+            pygame.draw.circle(self.screen, self.color, center, radius)
         else:
-            pygame.draw.circle(self.screen, self.color, self.object.center, self.object.width)
+            pygame.draw.circle(self.screen, self.color, center, radius)
 
         if self.color[0] + self.color[1] + self.color[2] > 200:
             text_color = (0, 0, 0)
@@ -165,38 +215,10 @@ class PlayerNode:
         default_font_size = 16
         dynamic_text_size = int(default_font_size * self.camera.zoom)
         text_to_render = f"{self.player_vertex.name}"
-        text_surface = pygame.font.Font(None, size=dynamic_text_size).render(text_to_render, True, text_color)
-        text_position = text_surface.get_rect(center=self.object.center)
+        text_surface = text_cache.render(text_to_render, dynamic_text_size, text_color)
+        text_position = text_surface.get_rect(center=center)
         self.screen.blit(text_surface, text_position)
 
-    def render_connection(self, node: "PlayerNode") -> None:
-        """
-        Draw a line between this node and another, assumign that this node is the ENDPOINT.
-        """
-        current_position = self.object.center
-        other_position = node.object.center
-
-        pygame.draw.line(self.screen, (200, 200, 200), current_position, other_position, 1)
-
-    def check_interaction(self, events: list[pygame.event.Event]) -> Optional["PlayerNode"]:
-        """
-        Handle when the player interacts with this object. Highlight if the player mouses over,
-        and depending if it was clicked or not,
-        return itself as an object to the entity it belongs to.
-        """
-        point = pygame.mouse.get_pos()
-        collide = self.object.collidepoint(point)
-
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Left click
-                if collide:
-                    self.is_highlighted = True
-                    return self
-                else:
-                    self.is_highlighted = False
-                    return None
-        return None
-
 
 class TeamButton:
     """
@@ -224,16 +246,15 @@ class TeamButton:
         Display this element on screen.
         """
         pygame.draw.rect(self.screen, DisplayData().get_team_colour(self.team), self.button, border_radius=5)
-        text_surface = pygame.font.Font(None, size=22).render(f"{self.team}", True, (255, 255, 255))
+        text_surface = text_cache.render(f"{self.team}", 22, (255, 255, 255))
         text_position = text_surface.get_rect(center=self.button.center)
         self.screen.blit(text_surface, text_position)
 
-    def check_interaction(self, events: list[pygame.event.Event]) -> str:
+    def check_interaction(self, events: list[pygame.event.Event], point: tuple[int, int]) -> str:
         """
-        Handle interaction with this element. If it is clicked on, return
-        the team name as a string.
+        Handle interaction with this element, given the mouse position relative to the surface the button is
+        drawn on. If it is clicked on, return the team name as a string.
         """
-        point = pygame.mouse.get_pos()
         collide = self.button.collidepoint(point)
         if collide:
             for event in events:
@@ -271,7 +292,7 @@ class WinrateMetrics:
         if self.metrics != {}:
             name = self.metrics["Name"]
             title_text = f"Overall Winrate Statistics For {name}"
-            title_surface = pygame.font.Font(None, size=24).render(title_text, True, (0, 0, 0))
+            title_surface = text_cache.render(title_text, 24, (0, 0, 0))
             title_position = title_surface.get_rect(topleft=(self.positional_data.left + 10,
                                                              self.positional_data.top + 20))
             self.screen.blit(title_surface, title_position)
@@ -281,7 +302,7 @@ class WinrateMetrics:
                 if metric == "Name":
                     continue
                 text_to_display = f"{metric}: {DisplayData().float_to_percentage(self.metrics[metric])}"
-                text_surface = pygame.font.Font(None, size=20).render(text_to_display, True, (0, 0, 0))
+                text_surface = text_cache.render(text_to_display, 20, (0, 0, 0))
                 text_position = text_surface.get_rect(topleft=(current_x, current_y))
                 current_y += 15
                 self.screen.blit(text_surface, text_position)
@@ -295,9 +316,10 @@ class WinrateMetrics:
         self.current_player = new_player
         player_vertex = self.current_player.player_vertex
         self.metrics["Name"] = player_vertex.name
-        self.metrics["Winrate % With Former Teammates"] = player_vertex.calc_avg_teammate_winrate()
-        self.metrics["Winrate % Against Former Teammates"] = player_vertex.calc_avg_opponent_winrate()
-        self.metrics["Absolute Winrate Difference"] = player_vertex.check_winrate_correlation()
+        with profiler.section("calc_avg_winrates"):
+            self.metrics["Winrate % With Former Teammates"] = player_vertex.calc_avg_teammate_winrate()
+            self.metrics["Winrate % Against Former Teammates"] = player_vertex.calc_avg_opponent_winrate()
+            self.metrics["Absolute Winrate Difference"] = player_vertex.check_winrate_correlation()
 
     def refresh(self) -> None:
         """
@@ -335,7 +357,7 @@ class HeadToHeadMetrics:
         """
         pygame.draw.rect(self.screen, (0, 0, 0), self.box, width=2, border_radius=2)
         if self.metrics != {}:
-            title_surface = pygame.font.Font(None, size=24).render(self.metrics["Title"], True, (0, 0, 0))
+            title_surface = text_cache.render(self.metrics["Title"], 24, (0, 0, 0))
             title_position = title_surface.get_rect(topleft=(self.positional_data.left + 10,
                                                              self.positional_data.top + 20))
             self.screen.blit(title_surface, title_position)
@@ -346,10 +368,10 @@ class HeadToHeadMetrics:
                     continue
                 if isinstance(self.metrics[metric], float):
                     text_to_display = f"{metric}: {DisplayData().float_to_percentage(self.metrics[metric])}"
-                    text_surface = pygame.font.Font(None, size=20).render(text_to_display, True, (0, 0, 0))
+                    text_surface = text_cache.render(text_to_display, 20, (0, 0, 0))
                 else:
                     text_to_display = f"{metric}: {self.metrics[metric]}"
-                    text_surface = pygame.font.Font(None, size=20).render(text_to_display, True, (0, 0, 0))
+                    text_surface = text_cache.render(text_to_display, 20, (0, 0, 0))
                 text_position = text_surface.get_rect(topleft=(current_x, current_y))
                 current_y += 15
                 self.screen.blit(text_surface, text_position)
@@ -371,11 +393,14 @@ class HeadToHeadMetrics:
             opponent_data = self.current_opponent.player_vertex
             self.metrics["Title"] = f"{player_data.name}'s Stats Against {opponent_data.name}"
 
-            head_to_head_data = player_data.return_edge_info(opponent_data.name)["opponent_stats"]
-            self.metrics["Games Played"] = head_to_head_data["games"]
-            self.metrics["Winrate %"] = head_to_head_data["w_pct"]
+            with profiler.section("head_to_head_lookup"):
+                head_to_head_data = player_data.return_edge_info(opponent_data.name)["opponent_stats"]
+                deviation_data = player_data.compute_winrate_difference(opponent_data)
+            self.metrics["Games Played"] = head_to_head_data.games
+            # The winrate is missing when the scraped percentage was empty
+            w_pct = head_to_head_data.w_pct
+            self.metrics["Winrate %"] = "N/A" if w_pct is None else w_pct
 
-            deviation_data = player_data.compute_winrate_difference(opponent_data)
             self.metrics["Deviation From Expected"] = deviation_data[1]
 
     def update_current_player(self, new_player: PlayerNode) -> None:
@@ -441,7 +466,7 @@ class StatList:
         if self.stats != {}:
             name = self.stats["Name"]
             title_text = f"{name}"
-            title_surface = pygame.font.Font(None, size=24).render(title_text, True, (0, 0, 0))
+            title_surface = text_cache.render(title_text, 24, (0, 0, 0))
             title_coordinates = (self.positional_data.left + (self.positional_data.width // 2),
                                  self.positional_data.top + 20)
             title_position = title_surface.get_rect(center=title_coordinates)
@@ -453,10 +478,10 @@ class StatList:
                     continue
                 if isinstance(self.stats[stat], float):
                     text_to_display = f"{stat}: {DisplayData().float_to_percentage(self.stats[stat])}"
-                    text_surface = pygame.font.Font(None, size=20).render(text_to_display, True, (0, 0, 0))
+                    text_surface = text_cache.render(text_to_display, 20, (0, 0, 0))
                 else:
                     text_to_display = f"{stat}: {self.stats[stat]}"
-                    text_surface = pygame.font.Font(None, size=20).render(text_to_display, True, (0, 0, 0))
+                    text_surface = text_cache.render(text_to_display, 20, (0, 0, 0))
                 text_position = text_surface.get_rect(topleft=(current_x, current_y))
                 current_y += 25
                 self.screen.blit(text_surface, text_position)
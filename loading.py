@@ -0,0 +1,194 @@
+"""
+Builds the player graph a chunk at a time, yielding to the event loop between chunks, so the loading screen can
+show progress and the visualization can start as soon as the team rosters are known. The data is read from the
+first of these that exists: the compiled snapshot, the compressed bundle of the web build (see snapshot.py), or
+the JSON datasets, whose player connections are added in the background while the visualization runs.
+"""
+import asyncio
+import json
+import os
+import re
+import zlib
+from typing import Callable, Iterator, Optional, TextIO
+from classes import Graph
+from snapshot import BUNDLE_FILE, SNAPSHOT_FILE, Snapshot
+
+STATS_FILE = "players_stats.json"
+CONNECTIONS_FILE = "active_players.json"
+
+# How many characters of a JSON file (or bytes of the bundle) are read at a time
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def parse_member(buffer: str, position: int) -> tuple[Optional[tuple[str, object]], int]:
+    """
+    Parse the object member starting at position in buffer, and return it as (key, value) with the position of
+    the comma or closing brace that follows it. Return None as the member if the object ends at position
+    instead. Raise ValueError if the buffer does not hold the whole member.
+    """
+    position = _WHITESPACE.match(buffer, position).end()
+    if buffer[position:position + 1] == "}":
+        return None, position
+
+    key, position = _DECODER.raw_decode(buffer, position)
+    position = _WHITESPACE.match(buffer, position).end()
+    if buffer[position:position + 1] != ":":
+        raise ValueError(f"Expected ':' after {key!r}")
+    value, position = _DECODER.raw_decode(buffer, _WHITESPACE.match(buffer, position + 1).end())
+
+    # The member is only known to be complete once the character after it has been read
+    position = _WHITESPACE.match(buffer, position).end()
+    if buffer[position:position + 1] not in (",", "}"):
+        raise ValueError(f"Expected ',' or '}}' after the value of {key!r}")
+    return (key, value), position
+
+
+def iter_json_object(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[str, object, int]]:
+    """
+    Parse the JSON object in the file one member at a time, reading chunk_size characters at a time, and yield
+    (key, value, characters read so far) for each member. Only the current chunk and the member being parsed
+    are held in memory, instead of the text of the whole file.
+    """
+    buffer = f.read(chunk_size)
+    characters_read = len(buffer)
+    position = _WHITESPACE.match(buffer).end()
+    if buffer[position:position + 1] != "{":
+        raise ValueError("Expected a JSON object")
+    position += 1
+
+    while True:
+        try:
+            member, position = parse_member(buffer, position)
+        except ValueError:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            characters_read += len(chunk)
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        if member is None:
+            return
+        yield member[0], member[1], characters_read
+        if buffer[position] == "}":
+            return
+        position += 1
+
+
+class GraphLoader:
+    """
+    Loads a Graph in two steps: load_players adds every player and builds the team rosters, and load_connections
+    adds the edges between them. Loading from a compiled snapshot or bundle is done in a single step by
+    load_players, since a snapshot's edges are read on demand anyway.
+    """
+    graph: Graph
+    directory: str
+    progress: float  # the fraction of the current step done so far, from 0 to 1
+    on_progress: Optional[Callable[[str, float], None]]  # called with a description of the step and progress
+
+    def __init__(self, graph: Graph, directory: str = ".",
+                 on_progress: Optional[Callable[[str, float], None]] = None) -> None:
+        self.graph = graph
+        self.directory = directory
+        self.progress = 0.0
+        self.on_progress = on_progress
+
+    def path(self, file_name: str) -> str:
+        """Return the path of the named data file."""
+        return os.path.join(self.directory, file_name)
+
+    def get_source(self) -> Optional[str]:
+        """
+        Return the name of the compiled file the graph is loaded from (SNAPSHOT_FILE or BUNDLE_FILE), or None if
+        it is loaded from the JSON datasets.
+        """
+        for file_name in (SNAPSHOT_FILE, BUNDLE_FILE):
+            if os.path.exists(self.path(file_name)):
+                return file_name
+        return None
+
+    def report(self, step: str, progress: float) -> None:
+        """Record the progress and pass it on to on_progress."""
+        self.progress = progress
+        if self.on_progress is not None:
+            self.on_progress(step, progress)
+
+    async def load_players(self) -> None:
+        """
+        Add every active player to the graph and build the team rosters, yielding to the event loop after each
+        chunk of the file that is parsed.
+        """
+        source = self.get_source()
+        if source == SNAPSHOT_FILE:
+            self.report("Opening snapshot", 0.0)
+            await asyncio.sleep(0)
+            self.graph.load_snapshot(Snapshot.open(self.path(SNAPSHOT_FILE)))
+            self.report("Loaded", 1.0)
+            return
+        if source == BUNDLE_FILE:
+            self.graph.load_snapshot(Snapshot(await self.decompress_bundle()))
+            self.report("Loaded", 1.0)
+            return
+
+        with open(self.path(STATS_FILE), "r") as f:
+            await self.load_chunks(f, "Loading players", self.graph.add_players)
+        self.graph.build_roster_indexes()
+        self.graph.loading = True
+        await asyncio.sleep(0)
+
+    async def load_connections(self) -> None:
+        """
+        Add the edges between the players, yielding to the event loop after each chunk of the file that is parsed.
+        Call after load_players. graph.loading is True until every edge is added.
+        """
+        if self.get_source() is not None:
+            return
+
+        with open(self.path(CONNECTIONS_FILE), "r") as f:
+            await self.load_chunks(f, "Loading connections", self.add_connections)
+        self.graph.loading = False
+
+    async def decompress_bundle(self) -> bytes:
+        """
+        Return the snapshot held in the compressed bundle, decompressing it a chunk at a time and yielding to
+        the event loop after each chunk.
+        """
+        decompressor = zlib.decompressobj()
+        parts = []
+        with open(self.path(BUNDLE_FILE), "rb") as f:
+            size = max(os.fstat(f.fileno()).st_size, 1)
+            while chunk := f.read(CHUNK_SIZE):
+                parts.append(decompressor.decompress(chunk))
+                self.report("Unpacking data", f.tell() / size)
+                await asyncio.sleep(0)
+        parts.append(decompressor.flush())
+        return b"".join(parts)
+
+    def add_connections(self, players: list[tuple[str, list[dict]]]) -> None:
+        """Add the edges of each (name, connections) pair to the graph."""
+        for name, connections in players:
+            self.graph.add_player_connections(name, connections)
+
+    async def load_chunks(self, f: TextIO, step: str, add: Callable[[list[tuple[str, object]]], None]) -> None:
+        """
+        Parse the JSON object in f, passing its members to add once per chunk read, then report how much of
+        the file is done and yield to the event loop.
+        """
+        size = max(os.fstat(f.fileno()).st_size, 1)
+        members, last_read = [], 0
+        for key, value, characters_read in iter_json_object(f):
+            if characters_read != last_read and members:
+                add(members)
+                members = []
+                # Characters read are close enough to bytes for ASCII-heavy data
+                self.report(step, min(last_read / size, 1.0))
+                await asyncio.sleep(0)
+            last_read = characters_read
+            members.append((key, value))
+        add(members)
+        self.report(step, 1.0)
+        await asyncio.sleep(0)
@@ -2,37 +2,46 @@
 The main driver code. Run from this file to play the visualization tool.
 """
 import asyncio
-import json
 import pygame
+from classes import Graph
+from loading import GraphLoader
 from visualization import Visualization
 
+
+def draw_progress(screen: pygame.Surface, font: pygame.font.Font, step: str, progress: float) -> None:
+    """
+    Draw the loading screen with the current step and a progress bar filled to the given fraction.
+    """
+    screen.fill((30, 30, 30))
+    text = font.render(f"{step}... {progress:.0%}", True, (200, 200, 200))
+    screen.blit(text, text.get_rect(center=(320, 210)))
+    pygame.draw.rect(screen, (200, 200, 200), (120, 250, 400, 20), width=2)
+    pygame.draw.rect(screen, (200, 200, 200), (124, 254, int(392 * progress), 12))
+    pygame.display.flip()
+
+
 async def main():
     pygame.init()
     screen = pygame.display.set_mode((640, 480))
     font = pygame.font.SysFont(None, 48)
 
     # Draw loading text
-    screen.fill((30, 30, 30))
-    text = font.render("Loading data...", True, (200, 200, 200))
-    screen.blit(text, (160, 200))
-    pygame.display.flip()
+    draw_progress(screen, font, "Loading data", 0.0)
 
     # Let browser repaint
     await asyncio.sleep(0)
 
-    # Load JSONs (synchronous)
-    with open("players_stats.json", "r") as f:
-        stats_data = json.load(f)
-
-    await asyncio.sleep(0)  # Let browser repaint
-
-    with open("active_players.json", "r") as f:
-        player_connections = json.load(f)
-
-    await asyncio.sleep(0)  # Let browser repaint
+    # Load the players and team rosters first, redrawing the progress after each chunk
+    graph = Graph()
+    loader = GraphLoader(graph, on_progress=lambda step, progress: draw_progress(screen, font, step, progress))
+    await loader.load_players()
 
-    # Start visualization
-    pygameInstance = Visualization(stats_data, player_connections)
+    # Start visualization, while the connections between players keep loading in the background
+    loader.on_progress = None
+    loading_task = asyncio.create_task(loader.load_connections())
+    pygameInstance = Visualization(graph)
     await pygameInstance.start_visualization()
+    loading_task.cancel()
+    graph.close()
 
-asyncio.run(main())
\ No newline at end of file
+asyncio.run(main())
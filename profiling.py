@@ -0,0 +1,160 @@
+"""
+Opt-in instrumentation for the visualization tool. Set the NBA_CONNECTIONS_PROFILE environment variable to turn
+it on. Hot paths are then timed and shown in an on-screen overlay (toggled with F3), and a Chrome trace of them
+is written to PROFILE_TRACE_FILE on exit. Load the trace in chrome://tracing or https://ui.perfetto.dev to see
+where a slow frame went.
+
+When profiling is off, every section is the same do-nothing context manager, so the instrumented code only pays
+for one method call.
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import ContextManager, Optional
+import pygame
+
+PROFILE_ENV = "NBA_CONNECTIONS_PROFILE"
+PROFILE_TRACE_FILE = "profile_trace.json"
+
+# The section returned while profiling is off
+NULL_SECTION = nullcontext()
+
+
+class ProfileSection:
+    """
+    A timed section of code, recorded as a complete ("X") trace event when it exits.
+    """
+    profiler: "Profiler"
+    name: str
+    start: int
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self) -> "ProfileSection":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+
+
+class Profiler:
+    """
+    Records timed sections and frame statistics. At most max_events trace events and the last window frames
+    are kept, so a long session does not grow without bound.
+    """
+    enabled: bool
+    show_overlay: bool
+    origin: int  # perf_counter_ns() when the profiler was created, so trace timestamps start near zero
+
+    events: deque[tuple[str, int, int]]  # (name, start, end) in nanoseconds
+    frame_times: deque[float]  # milliseconds spent handling each frame
+    frame_starts: deque[int]  # when each frame started, in nanoseconds
+    frame_allocations: deque[int]  # net memory blocks allocated by each frame
+    frame_start: int
+    frame_blocks: int
+    font: Optional[pygame.font.Font]
+
+    def __init__(self, enabled: bool, max_events: int = 200000, window: int = 240) -> None:
+        self.enabled = enabled
+        self.show_overlay = True
+        self.origin = time.perf_counter_ns()
+        self.events = deque(maxlen=max_events)
+        self.frame_times = deque(maxlen=window)
+        self.frame_starts = deque(maxlen=window)
+        self.frame_allocations = deque(maxlen=window)
+        self.frame_start = 0
+        self.frame_blocks = 0
+        self.font = None
+
+    def section(self, name: str) -> ContextManager:
+        """
+        Return a context manager that times the code inside of it under the given name.
+        """
+        if not self.enabled:
+            return NULL_SECTION
+        return ProfileSection(self, name)
+
+    def record(self, name: str, start: int, end: int) -> None:
+        """Record a section that ran from start to end (perf_counter_ns() values)."""
+        self.events.append((name, start, end))
+
+    def start_frame(self) -> None:
+        """Mark the start of a frame."""
+        self.frame_start = time.perf_counter_ns()
+        self.frame_blocks = sys.getallocatedblocks()
+
+    def end_frame(self) -> None:
+        """Mark the end of the frame started by the last call to start_frame."""
+        end = time.perf_counter_ns()
+        self.record("frame", self.frame_start, end)
+        self.frame_times.append((end - self.frame_start) / 1e6)
+        self.frame_starts.append(self.frame_start)
+        self.frame_allocations.append(sys.getallocatedblocks() - self.frame_blocks)
+
+    def get_summary(self) -> dict[str, float]:
+        """
+        Return the frames per second, 50th and 99th percentile frame times in milliseconds, and mean net memory
+        blocks allocated per frame, over the recent frames.
+        """
+        if len(self.frame_times) < 2:
+            return {"fps": 0.0, "p50": 0.0, "p99": 0.0, "allocations": 0.0}
+        elapsed = (self.frame_starts[-1] - self.frame_starts[0]) / 1e9
+        percentiles = statistics.quantiles(self.frame_times, n=100, method="inclusive")
+        return {
+            "fps": (len(self.frame_starts) - 1) / elapsed if elapsed else 0.0,
+            "p50": percentiles[49],
+            "p99": percentiles[98],
+            "allocations": statistics.fmean(self.frame_allocations),
+        }
+
+    def render_overlay(self, screen: pygame.Surface) -> Optional[pygame.Rect]:
+        """
+        Draw the overlay in the top left corner of the screen and return the area it covers, or None if the
+        overlay is hidden.
+        """
+        if not self.show_overlay:
+            return None
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+
+        summary = self.get_summary()
+        lines = [
+            f"FPS: {summary['fps']:.0f}",
+            f"frame p50: {summary['p50']:.2f} ms  p99: {summary['p99']:.2f} ms",
+            f"allocated blocks/frame: {summary['allocations']:+.0f}",
+        ]
+        overlay = pygame.Rect(4, 4, 250, 8 + 14 * len(lines))
+        pygame.draw.rect(screen, (0, 0, 0), overlay)
+        for index, line in enumerate(lines):
+            screen.blit(self.font.render(line, True, (0, 255, 0)), (overlay.left + 4, overlay.top + 4 + 14 * index))
+        return overlay
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+        Write the recorded sections to path in the Chrome trace event format, with timestamps in microseconds.
+        """
+        trace_events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": 0,
+                "tid": 0,
+            }
+            for name, start, end in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+
+# The profiler used by the whole visualization
+profiler = Profiler(bool(os.environ.get(PROFILE_ENV)))
@@ -0,0 +1,392 @@
+"""
+A module for the compiled snapshot of the player datasets. Loading a snapshot replaces parsing players_stats.json
+and active_players.json with json.load at startup, which stalls the browser build for seconds.
+
+Every string (player names, teams and seasons) is interned once into a string table. Player and connection stats
+are stored as typed numeric columns, and each player's connections are stored as an offset array into a shared
+array of target player indexes (a CSR adjacency layout). Reading a snapshot memory-maps the file and only slices
+typed views out of it. Where the file cannot be memory-mapped, everything but the connection stats is read into
+memory, and the connection stats of a player are read from the file with seeks when they are first needed.
+
+For the web build, the snapshot is pruned to the active players (the only ones the visualization shows) and
+compressed with zlib into a bundle, which the browser downloads and decompresses instead of the whole snapshot.
+
+Run this file to convert the JSON datasets into a snapshot and a bundle.
+"""
+from __future__ import annotations
+import json
+import math
+import struct
+import sys
+import zlib
+from array import array
+from typing import BinaryIO, Iterable, Optional, Union
+
+try:
+    import mmap
+except ImportError:  # Not every WebAssembly build of Python ships mmap
+    mmap = None
+
+SNAPSHOT_FILE = "players_snapshot.bin"
+BUNDLE_FILE = "players_bundle.z"
+SNAPSHOT_MAGIC = b"NBAS"
+SNAPSHOT_VERSION = 2
+
+# Same fields and types as archive/webscraper.parse_individual_player
+PLAYER_STAT_FIELDS: tuple[tuple[str, type], ...] = (
+    ("games", int),
+    ("minutes", int),
+    ("fg", int),
+    ("fga", int),
+    ("fgp", float),
+    ("fg3p", float),
+    ("fg2p", float),
+    ("ftp", float),
+    ("points", int),
+)
+
+# The numeric fields of archive/webscraper.parse_player_data, kept for both the teammate and opponent stats
+EDGE_COUNT_FIELDS: tuple[str, ...] = (
+    "games", "wins", "losses", "g_reg", "w_reg", "l_reg", "g_ply", "w_ply", "l_ply"
+)
+EDGE_PCT_FIELDS: tuple[str, ...] = ("w_pct", "w_pct_reg", "w_pct_ply")
+# basketball-reference.com gives percentages to three decimals (e.g. ".583"). They are stored as float32, which
+# holds that exactly enough to be rounded back to the value that was scraped when read.
+PCT_DECIMALS = 3
+EDGE_SIDES: tuple[str, ...] = ("teammate", "opponent")
+
+# Every section of the file in order, as (name, array typecode). Stats that a player is missing are stored as NaN.
+# The connection stats come last, so everything before them can be read as one block.
+SECTIONS: list[tuple[str, str]] = [
+    ("string_data", "B"),
+    ("string_offsets", "I"),
+    ("player_names", "I"),
+    ("player_first_team", "I"),
+    ("player_last_team", "I"),
+    ("player_active", "B"),
+    ("season_offsets", "I"),
+    ("seasons", "I"),
+    *[(f"stat_{field}", "d") for field, _ in PLAYER_STAT_FIELDS],
+    ("edge_offsets", "I"),
+    ("edge_targets", "I"),
+    *[(f"{side}_{field}", "H") for side in EDGE_SIDES for field in EDGE_COUNT_FIELDS],
+    *[(f"{side}_{field}", "f") for side in EDGE_SIDES for field in EDGE_PCT_FIELDS],
+]
+
+# The sections of the connection stats, which are read on demand when the snapshot is not memory-mapped
+EDGE_STAT_SECTIONS: list[str] = [
+    *[f"{side}_{field}" for side in EDGE_SIDES for field in EDGE_COUNT_FIELDS],
+    *[f"{side}_{field}" for side in EDGE_SIDES for field in EDGE_PCT_FIELDS],
+]
+
+_HEADER = struct.Struct("<4sHH")
+_SECTION_ENTRY = struct.Struct("<QQ")
+_ALIGNMENT = 8
+
+
+def parse_count(value: Union[str, int, float]) -> int:
+    """Convert a count from the scraped datasets (e.g. "41") to an int. Empty values count as 0."""
+    if value in ("", None):
+        return 0
+    return int(float(value))
+
+
+def parse_pct(value: Union[str, int, float]) -> float:
+    """Convert a percentage from the scraped datasets (e.g. ".583") to a float. Empty values become NaN."""
+    if value in ("", None):
+        return math.nan
+    return float(value)
+
+
+class SnapshotBuilder:
+    """
+    Accumulates the columns of a snapshot from the JSON datasets.
+    """
+    strings: list[str]
+    string_ids: dict[str, int]
+    columns: dict[str, array]
+
+    def __init__(self) -> None:
+        self.strings = []
+        self.string_ids = {}
+        self.columns = {name: array(typecode) for name, typecode in SECTIONS}
+        self.columns["season_offsets"].append(0)
+        self.columns["edge_offsets"].append(0)
+
+    def intern(self, value: str) -> int:
+        """Return the index of value in the string table, adding it if it is not there yet."""
+        if value not in self.string_ids:
+            self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return self.string_ids[value]
+
+    def add_player(self, name: str, info: dict) -> None:
+        """Add a row to the player columns from an entry of players_stats.json."""
+        columns = self.columns
+        columns["player_names"].append(self.intern(name))
+        columns["player_first_team"].append(self.intern(info.get("first_team") or ""))
+        columns["player_last_team"].append(self.intern(info.get("last_team") or ""))
+        columns["player_active"].append(1 if info.get("active", False) else 0)
+
+        columns["seasons"].extend(self.intern(season) for season in info.get("seasons", []))
+        columns["season_offsets"].append(len(columns["seasons"]))
+
+        stats = info.get("stats", {})
+        for field, _ in PLAYER_STAT_FIELDS:
+            columns[f"stat_{field}"].append(float(stats[field]) if field in stats else math.nan)
+
+    def add_connections(self, connections: Iterable[dict], player_ids: dict[str, int]) -> None:
+        """
+        Add the connections of the next player from an entry of active_players.json, sorted by target player.
+        Connections to players that are not in player_ids are dropped.
+        """
+        columns = self.columns
+        targets = [(player_ids[connection["name"]], connection)
+                   for connection in connections if connection["name"] in player_ids]
+        targets.sort(key=lambda target: target[0])
+        for target, connection in targets:
+            columns["edge_targets"].append(target)
+            for side in EDGE_SIDES:
+                stats = connection.get(f"{side}_stats", {})
+                for field in EDGE_COUNT_FIELDS:
+                    columns[f"{side}_{field}"].append(parse_count(stats.get(field)))
+                for field in EDGE_PCT_FIELDS:
+                    columns[f"{side}_{field}"].append(parse_pct(stats.get(field)))
+        columns["edge_offsets"].append(len(columns["edge_targets"]))
+
+    def to_bytes(self) -> bytes:
+        """Return the finished snapshot as bytes, in little-endian byte order."""
+        encoded = [value.encode("utf-8") for value in self.strings]
+        offsets = self.columns["string_offsets"]
+        del offsets[:]
+        offsets.append(0)
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        self.columns["string_data"] = array("B", b"".join(encoded))
+
+        header_size = _HEADER.size + _SECTION_ENTRY.size * len(SECTIONS)
+        position = _align(header_size)
+        entries, payloads = [], []
+        for name, _ in SECTIONS:
+            column = self.columns[name]
+            if sys.byteorder != "little":
+                column = array(column.typecode, column)
+                column.byteswap()
+            payload = column.tobytes()
+            entries.append(_SECTION_ENTRY.pack(position, len(column)))
+            payloads.append((position, payload))
+            position = _align(position + len(payload))
+
+        result = bytearray(position)
+        result[:header_size] = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(SECTIONS)) + b"".join(entries)
+        for start, payload in payloads:
+            result[start:start + len(payload)] = payload
+        return bytes(result)
+
+
+def _align(position: int) -> int:
+    """Round position up so that every section starts on an 8 byte boundary."""
+    return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def build_snapshot(stats_data: dict, player_connections: dict, active_only: bool = False) -> bytes:
+    """
+    Given the contents of players_stats.json and active_players.json, return the equivalent snapshot as bytes.
+    Players whose stats failed to scrape (stored as an empty list) are skipped. If active_only is True, retired
+    players and the connections to them are left out as well, since the visualization never shows them.
+    """
+    builder = SnapshotBuilder()
+    player_ids = {}
+    for name, info in stats_data.items():
+        if isinstance(info, dict) and (info.get("active", False) or not active_only):
+            player_ids[name] = len(player_ids)
+            builder.add_player(name, info)
+
+    for name in player_ids:
+        builder.add_connections(player_connections.get(name, []), player_ids)
+
+    return builder.to_bytes()
+
+
+def convert_json(stats_file: str, connections_file: str, snapshot_file: str, bundle_file: str) -> None:
+    """
+    Convert the players_stats.json and active_players.json datasets into a snapshot file, and into a bundle for
+    the web build: a snapshot of only the active players, compressed with zlib. Each dataset is parsed once and
+    both are built from it.
+    """
+    with open(stats_file, "r") as f:
+        stats_data = json.load(f)
+    with open(connections_file, "r") as f:
+        player_connections = json.load(f)
+    with open(snapshot_file, "wb") as f:
+        f.write(build_snapshot(stats_data, player_connections))
+    with open(bundle_file, "wb") as f:
+        f.write(zlib.compress(build_snapshot(stats_data, player_connections, active_only=True), 9))
+
+
+class Snapshot:
+    """
+    A read-only view over the contents of a snapshot file. Each section held in buffer is exposed as a typed
+    memoryview over it, so no column is copied when the snapshot is loaded. Sections past the end of buffer are
+    read from file when needed instead.
+    """
+    buffer: Union[bytes, mmap.mmap]
+    view: memoryview  # over buffer, which the columns are cast from
+    file: Optional[BinaryIO]
+    sections: dict[str, tuple[int, int]]  # section name -> (start in the file, number of values)
+    columns: dict[str, Union[memoryview, array]]
+    player_count: int
+    edge_count: int
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], file: Optional[BinaryIO] = None) -> None:
+        magic, version, section_count = _HEADER.unpack_from(buffer, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or section_count != len(SECTIONS):
+            raise ValueError("Not a supported player snapshot. Rebuild it by running snapshot.py")
+
+        self.buffer = buffer
+        self.file = file
+        self.sections = {}
+        self.columns = {}
+        self.view = view = memoryview(buffer)
+        for index, (name, typecode) in enumerate(SECTIONS):
+            start, count = _SECTION_ENTRY.unpack_from(buffer, _HEADER.size + index * _SECTION_ENTRY.size)
+            self.sections[name] = (start, count)
+            size = count * array(typecode).itemsize
+            if start + size > len(buffer):
+                if file is None:
+                    raise ValueError("The snapshot is truncated. Rebuild it by running snapshot.py")
+                continue
+            if sys.byteorder == "little":
+                self.columns[name] = view[start:start + size].cast(typecode)
+            else:
+                column = array(typecode, bytes(view[start:start + size]))
+                column.byteswap()
+                self.columns[name] = column
+
+        self.player_count = len(self.columns["player_names"])
+        self.edge_count = len(self.columns["edge_targets"])
+
+    @classmethod
+    def open(cls, path: str, memory_map: bool = True) -> Snapshot:
+        """
+        Memory-map the snapshot file at path, so that only the pages that are actually used get read from disk.
+        On platforms that cannot memory-map it (e.g. the browser build), or if memory_map is False, read
+        everything but the connection stats instead, and keep the file open to read those from when needed.
+        """
+        f = open(path, "rb")
+        if memory_map:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, OSError, ValueError):
+                pass
+            else:
+                f.close()
+                return cls(buffer)
+
+        header = f.read(_HEADER.size + _SECTION_ENTRY.size * len(SECTIONS))
+        first_stat_section = [name for name, _ in SECTIONS].index(EDGE_STAT_SECTIONS[0])
+        stats_start, _ = _SECTION_ENTRY.unpack_from(header, _HEADER.size + first_stat_section * _SECTION_ENTRY.size)
+        return cls(header + f.read(stats_start - len(header)), f)
+
+    def close(self) -> None:
+        """
+        Release the columns and close the memory map of the snapshot (which holds its own handle on the mapped
+        file), or the file connection stats are read from when it is not memory-mapped. The snapshot cannot be
+        read afterwards.
+        """
+        for column in self.columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        self.columns = {}
+        self.view.release()
+        if mmap is not None and isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def read_column(self, name: str, start: int, stop: int) -> Union[memoryview, array]:
+        """
+        Return the values at indexes start to stop of the named section, reading them from the file if the
+        section is not in memory.
+        """
+        if name in self.columns:
+            return self.columns[name][start:stop]
+
+        typecode = dict(SECTIONS)[name]
+        column = array(typecode)
+        section_start, _ = self.sections[name]
+        self.file.seek(section_start + start * column.itemsize)
+        column.frombytes(self.file.read((stop - start) * column.itemsize))
+        if sys.byteorder != "little":
+            column.byteswap()
+        return column
+
+    def string(self, index: int) -> str:
+        """Return the interned string with the given index."""
+        offsets = self.columns["string_offsets"]
+        return bytes(self.columns["string_data"][offsets[index]:offsets[index + 1]]).decode("utf-8")
+
+    def player_name(self, player: int) -> str:
+        """Return the name of the player with the given index."""
+        return self.string(self.columns["player_names"][player])
+
+    def player_active(self, player: int) -> bool:
+        """Return whether the player with the given index played this season."""
+        return self.columns["player_active"][player] == 1
+
+    def player_teams(self, player: int) -> tuple[str, str]:
+        """Return the (first_team, last_team) of the player with the given index."""
+        return (self.string(self.columns["player_first_team"][player]),
+                self.string(self.columns["player_last_team"][player]))
+
+    def player_seasons(self, player: int) -> list[str]:
+        """Return the seasons played by the player with the given index."""
+        offsets = self.columns["season_offsets"]
+        return [self.string(season) for season in self.columns["seasons"][offsets[player]:offsets[player + 1]]]
+
+    def player_stats(self, player: int) -> dict[str, Union[int, float]]:
+        """
+        Return the career stats of the player with the given index, in the same format as players_stats.json.
+        """
+        stats = {}
+        for field, converter in PLAYER_STAT_FIELDS:
+            value = self.columns[f"stat_{field}"][player]
+            if not math.isnan(value):
+                stats[field] = converter(value)
+        return stats
+
+    def edge_range(self, player: int) -> range:
+        """Return the range of edge indexes holding the connections of the player with the given index."""
+        offsets = self.columns["edge_offsets"]
+        return range(offsets[player], offsets[player + 1])
+
+    def player_edge_stats(self, player: int) -> list[tuple[dict[str, Union[int, float]], dict[str, Union[int, float]]]]:
+        """
+        Return the (teammate stats, opponent stats) of every edge of the player with the given index, in the order
+        of edge_range, with the same keys as archive/webscraper.parse_player_data. Percentages that were empty are
+        left out, and the others are rounded back to the precision they were scraped with. Each stats column is
+        read with one slice (or one seek and read when not memory-mapped).
+        """
+        edge_range = self.edge_range(player)
+        sides = []
+        for side in EDGE_SIDES:
+            counts = [(field, self.read_column(f"{side}_{field}", edge_range.start, edge_range.stop))
+                      for field in EDGE_COUNT_FIELDS]
+            pcts = [(field, self.read_column(f"{side}_{field}", edge_range.start, edge_range.stop))
+                    for field in EDGE_PCT_FIELDS]
+            side_stats = []
+            for edge in range(len(edge_range)):
+                stats = {field: column[edge] for field, column in counts}
+                for field, column in pcts:
+                    value = column[edge]
+                    if value == value:  # NaN marks an empty percentage
+                        stats[field] = round(value, PCT_DECIMALS)
+                side_stats.append(stats)
+            sides.append(side_stats)
+        return list(zip(*sides))
+
+
+if __name__ == "__main__":
+    convert_json("players_stats.json", "active_players.json", SNAPSHOT_FILE, BUNDLE_FILE)
+    print(f"Saved {SNAPSHOT_FILE} and {BUNDLE_FILE}")
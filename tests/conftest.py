@@ -0,0 +1,94 @@
+"""
+Fixtures shared by the tests: a stub HTTP server on localhost that the scraper's fetching code is run against.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator, Union
+
+import pytest
+
+# A response is (status, headers, body); a route gives the responses to the requests for one path
+Response = tuple[int, dict[str, str], bytes]
+Route = Union[Response, list[Response], Callable[[dict[str, str]], Response]]
+
+
+class StubServer:
+    """
+    Serves the responses set in routes, keyed by path. A list of responses is served one per request, repeating
+    the last one once the others are used up, and a function is called with the request's headers. Each request
+    is recorded in requests as (path, headers, time it arrived), and delays holds how long to wait before
+    answering a path, to simulate a slow response.
+    """
+    routes: dict[str, Route]
+    delays: dict[str, float]
+    requests: list[tuple[str, dict[str, str], float]]
+    in_flight: int
+    max_in_flight: int
+    lock: threading.Lock
+    server: ThreadingHTTPServer
+
+    def __init__(self) -> None:
+        self.routes = {}
+        self.delays = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.server.daemon_threads = True
+
+    def url(self, path: str) -> str:
+        """Return the URL of path on this server."""
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def count(self, path: str) -> int:
+        """Return how many requests were made for path."""
+        return sum(1 for request_path, _, _ in self.requests if request_path == path)
+
+    def respond(self, path: str, headers: dict[str, str]) -> Response:
+        """Return the response to the next request for path."""
+        with self.lock:
+            self.requests.append((path, headers, time.monotonic()))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            route = self.routes.get(path, (404, {}, b""))
+            if isinstance(route, list):
+                route = route.pop(0) if len(route) > 1 else route[0]
+        try:
+            time.sleep(self.delays.get(path, 0.0))
+            return route(headers) if callable(route) else route
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def make_handler(self) -> type:
+        """Return the request handler class of this server."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers GET requests from the stub's routes."""
+            def do_GET(self) -> None:
+                status, headers, body = stub.respond(self.path, dict(self.headers))
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def stub_server() -> Iterator[StubServer]:
+    """A StubServer running in a background thread for the duration of the test."""
+    stub = StubServer()
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
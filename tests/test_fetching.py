@@ -0,0 +1,125 @@
+"""
+Tests for archive/fetching.py, run against a stub HTTP server on localhost.
+"""
+import time
+
+import pytest
+import requests
+
+from archive.fetching import FetchEngine, RetryPolicy, TokenBucket
+
+OK = (200, {}, b"ok")
+
+
+def make_engine(requests_per_minute: float = 6000, **kwargs: object) -> FetchEngine:
+    """Return an engine that retries quickly, so the tests do not wait on real backoff delays."""
+    kwargs.setdefault("retry", RetryPolicy(max_retries=3, retry_delay=0.01))
+    return FetchEngine(requests_per_minute=requests_per_minute, **kwargs)
+
+
+def test_token_bucket_spaces_out_acquires() -> None:
+    """After the first token, tokens are handed out at the bucket's rate."""
+    bucket = TokenBucket(rate=20)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start >= 4 / 20 - 0.01
+
+
+def test_requests_are_rate_limited(stub_server) -> None:
+    """Concurrent requests still reach the server no faster than the engine's rate."""
+    paths = [f"/page{i}" for i in range(6)]
+    for path in paths:
+        stub_server.routes[path] = OK
+
+    with make_engine(requests_per_minute=600, max_workers=4) as engine:
+        list(engine.map(lambda path: engine.get(stub_server.url(path)), paths))
+
+    arrivals = sorted(arrived for _, _, arrived in stub_server.requests)
+    gaps = [later - earlier for earlier, later in zip(arrivals, arrivals[1:])]
+    assert len(arrivals) == 6
+    assert min(gaps) >= 0.1 - 0.02
+    assert arrivals[-1] - arrivals[0] >= 5 * 0.1 - 0.05
+
+
+def test_requests_in_flight_per_host_are_limited(stub_server) -> None:
+    """No more than max_per_host requests are sent to one host at once, even with more workers."""
+    paths = [f"/slow{i}" for i in range(6)]
+    for path in paths:
+        stub_server.routes[path] = OK
+        stub_server.delays[path] = 0.1
+
+    with make_engine(max_workers=6, max_per_host=2) as engine:
+        list(engine.map(lambda path: engine.get(stub_server.url(path)), paths))
+
+    assert stub_server.max_in_flight == 2
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504])
+def test_server_errors_are_retried(stub_server, status: int) -> None:
+    """A server error is retried until the request succeeds."""
+    stub_server.routes["/flaky"] = [(status, {}, b""), (status, {}, b""), OK]
+
+    with make_engine() as engine:
+        response = engine.get(stub_server.url("/flaky"))
+
+    assert response.text == "ok"
+    assert stub_server.count("/flaky") == 3
+
+
+def test_backoff_grows_between_retries(stub_server) -> None:
+    """Each retry waits backoff times longer than the one before it."""
+    stub_server.routes["/flaky"] = [(503, {}, b""), (503, {}, b""), OK]
+
+    with make_engine(retry=RetryPolicy(max_retries=3, retry_delay=0.1, backoff=2)) as engine:
+        engine.get(stub_server.url("/flaky"))
+
+    arrivals = [arrived for _, _, arrived in stub_server.requests]
+    assert arrivals[1] - arrivals[0] >= 0.1
+    assert arrivals[2] - arrivals[1] >= 0.2
+
+
+def test_too_many_requests_waits_for_retry_after(stub_server) -> None:
+    """A 429 is retried after the Retry-After header's wait when it is longer than the backoff."""
+    stub_server.routes["/limited"] = [(429, {"Retry-After": "1"}, b""), OK]
+
+    with make_engine() as engine:
+        response = engine.get(stub_server.url("/limited"))
+
+    arrivals = [arrived for _, _, arrived in stub_server.requests]
+    assert response.text == "ok"
+    assert arrivals[1] - arrivals[0] >= 1.0
+
+
+def test_gives_up_after_max_retries(stub_server) -> None:
+    """The last error is raised once every attempt has failed."""
+    stub_server.routes["/down"] = (503, {}, b"")
+
+    with make_engine() as engine, pytest.raises(requests.HTTPError):
+        engine.get(stub_server.url("/down"))
+
+    assert stub_server.count("/down") == 3
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_client_errors_are_not_retried(stub_server, status: int) -> None:
+    """A client error other than 429 fails at once, since sending it again would not help."""
+    stub_server.routes["/missing"] = (status, {}, b"")
+
+    with make_engine() as engine, pytest.raises(requests.HTTPError):
+        engine.get(stub_server.url("/missing"))
+
+    assert stub_server.count("/missing") == 1
+
+
+def test_map_keeps_the_order_of_its_items(stub_server) -> None:
+    """map yields results in the order of its items, even when later items finish first."""
+    paths = [f"/item{i}" for i in range(5)]
+    for index, path in enumerate(paths):
+        stub_server.routes[path] = (200, {}, path.encode())
+        stub_server.delays[path] = 0.05 * (len(paths) - index)
+
+    with make_engine(max_workers=5, max_per_host=5) as engine:
+        results = list(engine.map(lambda path: engine.get(stub_server.url(path)).text, paths))
+
+    assert results == paths
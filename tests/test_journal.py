@@ -0,0 +1,135 @@
+"""
+Tests for archive/journal.py and the resumable scrapes of archive/webscraper.py built on it.
+"""
+import json
+import os
+
+import pytest
+
+from archive import webscraper
+from archive.journal import ScrapeJournal
+
+
+def test_record_and_compact(tmp_path) -> None:
+    """The latest value of each key is compacted, in the order the keys were first recorded."""
+    path = str(tmp_path / "journal.jsonl")
+    with ScrapeJournal(path, sync=False) as journal:
+        journal.record("a", {"games": 1})
+        journal.record("b", [])
+        journal.record("a", {"games": 2})
+        assert journal.compact(str(tmp_path / "out.json")) == 2
+
+    with open(tmp_path / "out.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == {"a": {"games": 2}, "b": []}
+
+
+def test_failure_is_explicit(tmp_path) -> None:
+    """Only values recorded as failed are failures: an empty value is a genuine result."""
+    path = str(tmp_path / "journal.jsonl")
+    with ScrapeJournal(path, sync=False) as journal:
+        journal.record("no teammates", [])
+        journal.record("timed out", [], failed=True)
+        journal.record("retried", [], failed=True)
+        journal.record("retried", [{"name": "Someone"}])
+        assert journal.failed == {"timed out"}
+
+    with ScrapeJournal(path, sync=False) as journal:
+        assert journal.failed == {"timed out"}
+
+
+def test_incomplete_line_is_dropped(tmp_path) -> None:
+    """A line cut short by a crash is truncated away, and its offset is reported instead of printed."""
+    path = str(tmp_path / "journal.jsonl")
+    with ScrapeJournal(path, sync=False) as journal:
+        journal.record("a", {"games": 1})
+    complete_size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b'["b", {"ga')
+
+    with ScrapeJournal(path, sync=False) as journal:
+        assert journal.dropped_offset == complete_size
+        assert "a" in journal and "b" not in journal
+    assert os.path.getsize(path) == complete_size
+
+
+@pytest.fixture
+def data_directory(tmp_path, monkeypatch) -> str:
+    """Run the test in an empty directory holding the data/ directory the scraper writes to."""
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    return str(tmp_path)
+
+
+def test_interrupted_scrape_resumes(data_directory) -> None:
+    """A scrape stopped partway is resumed from its journal, scraping only the players it had not done."""
+    players = {f"id{i}": f"Player {i}" for i in range(6)}
+    scraped = []
+
+    def interrupted(player_id: str) -> list:
+        if player_id == "id3":
+            raise KeyboardInterrupt
+        scraped.append(player_id)
+        return [player_id]
+
+    with pytest.raises(KeyboardInterrupt):
+        webscraper.scrape_with_journal(players, interrupted, "data/j.jsonl", "data/out.json")
+    assert scraped[:3] == ["id0", "id1", "id2"]
+
+    scraped.clear()
+    webscraper.scrape_with_journal(players, lambda player_id: scraped.append(player_id) or [player_id],
+                                   "data/j.jsonl", "data/out.json")
+    assert "id0" not in scraped and "id3" in scraped
+    with open("data/out.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == {name: [player_id] for player_id, name in players.items()}
+
+
+def test_finished_scrape_is_not_reused(data_directory) -> None:
+    """Once a scrape finishes, its journal is put aside, so the next scrape fetches every player again."""
+    players = {"id0": "Player 0", "id1": "Player 1"}
+    webscraper.scrape_with_journal(players, lambda player_id: ["old"], "data/j.jsonl", "data/out.json")
+    assert not os.path.exists("data/j.jsonl")
+    assert os.path.exists("data/j.jsonl" + webscraper.COMPLETED_SUFFIX)
+
+    webscraper.scrape_with_journal(players, lambda player_id: ["new"], "data/j.jsonl", "data/out.json")
+    with open("data/out.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == {"Player 0": ["new"], "Player 1": ["new"]}
+
+
+def test_fresh_scrape_discards_an_unfinished_journal(data_directory) -> None:
+    """A discarded journal is not resumed: every player is scraped again."""
+    with ScrapeJournal("data/j.jsonl") as journal:
+        journal.record("Player 0", ["stale"])
+
+    webscraper.discard_journal("data/j.jsonl")
+    webscraper.scrape_with_journal({"id0": "Player 0"}, lambda player_id: ["new"], "data/j.jsonl",
+                                   "data/out.json")
+    with open("data/out.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == {"Player 0": ["new"]}
+
+
+def test_failed_scrapes_are_recorded_as_failed(data_directory) -> None:
+    """A scrape returning None is stored as an empty list and marked failed; a genuine [] is not."""
+    players = {"id0": "No rows", "id1": "Failed"}
+    webscraper.scrape_with_journal(players, lambda player_id: [] if player_id == "id0" else None,
+                                   "data/j.jsonl", "data/out.json")
+
+    with ScrapeJournal("data/j.jsonl" + webscraper.COMPLETED_SUFFIX) as journal:
+        assert journal.failed == {"Failed"}
+    with open("data/out.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == {"No rows": [], "Failed": []}
+
+
+def test_missing_stats_are_filled_in_without_a_journal(data_directory, monkeypatch) -> None:
+    """Stats scraped before journals were kept are repaired from the failed entries of players_stats.json."""
+    with open("data/players.json", "w", encoding="utf-8") as f:
+        json.dump({"id0": "Player 0", "id1": "Player 1"}, f)
+    with open("data/players_stats.json", "w", encoding="utf-8") as f:
+        json.dump({"Player 0": {"games": 1}, "Player 1": []}, f)
+    scraped = []
+    monkeypatch.setattr(webscraper, "scrape_individual_player",
+                        lambda player_id: scraped.append(player_id) or {"games": 2})
+
+    webscraper.gen_all_missing_player_stats()
+    assert scraped == ["id1"]
+    with open("data/players_stats.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == {"Player 0": {"games": 1}, "Player 1": {"games": 2}}
@@ -0,0 +1,123 @@
+"""
+Tests for archive/refresh.py, run against a stub of basketball-reference.com on localhost.
+"""
+import json
+import os
+from typing import Iterator
+
+import pytest
+
+from archive import refresh, webscraper
+from archive.fetching import FetchEngine
+from tests.conftest import StubServer
+
+
+def row(name: str, games: int) -> str:
+    """Return a table row of teammates_and_opponents.fcgi for name, with every stat set to games."""
+    return "<tr>" + "".join(f"<td>{value}</td>" for value in [name] + [str(games)] * 14) + "</tr>"
+
+
+def player_page(seasons: list[str]) -> bytes:
+    """Return a player page holding just what extract_player_data reads, for a player who played in seasons."""
+    years = "".join(f'<tr><th data-stat="season"><a>{season}</a></th><td data-stat="team_name_abbr">LAL</td></tr>'
+                    for season in seasons)
+    return (f'<img itemscope="image" src="x.png"><div id="div_totals_stats"><table><tbody>{years}</tbody>'
+            f'<tfoot><tr id="career"><td data-stat="games">10</td></tr></tfoot></table></div>').encode()
+
+
+def rows_page(rows: list[tuple[str, int]]) -> bytes:
+    """Return a teammates_and_opponents.fcgi page with the given (name, games) rows."""
+    return ("<table><tbody>" + "".join(row(name, games) for name, games in rows) + "</tbody></table>").encode()
+
+
+def rows_path(player_id: str, s_type: str) -> str:
+    """Return the path of the teammates (t) or opponents (o) page of player_id."""
+    return f"/friv/teammates_and_opponents.fcgi?pid={player_id}&type={s_type}"
+
+
+@pytest.fixture
+def site(stub_server, monkeypatch) -> Iterator[StubServer]:
+    """
+    Point the scraper at the stub server, which knows an active player (aa), a retired one (bb) and a rookie
+    (cc), and use an engine that does not wait on the rate limit.
+    """
+    monkeypatch.setattr(webscraper, "SITE", stub_server.url(""))
+    engine = FetchEngine(requests_per_minute=6000)
+    monkeypatch.setattr(webscraper, "get_engine", lambda: engine)
+
+    current = webscraper.CURRENT_SEASON
+    stub_server.routes["/players/a/aa.html"] = (200, {}, player_page(["2023-24", current]))
+    stub_server.routes["/players/c/cc.html"] = (200, {}, player_page([current]))
+    stub_server.routes[rows_path("aa", "t")] = (200, {}, rows_page([("Bob B", 9), ("Cal C", 5)]))
+    stub_server.routes[rows_path("aa", "o")] = (200, {}, rows_page([("Bob B", 8), ("Cal C", 4), ("Dan D", 1)]))
+    stub_server.routes[rows_path("cc", "t")] = (200, {}, rows_page([("Al A", 5)]))
+    stub_server.routes[rows_path("cc", "o")] = (200, {}, rows_page([("Al A", 4)]))
+    yield stub_server
+    engine.close()
+
+
+def write_datasets(directory: str) -> None:
+    """Write the datasets of the last full scrape, before the rookie Cal C joined."""
+    old_row = {"name": "", "games": "1"}
+    datasets = {
+        refresh.PLAYERS_FILE: {"aa": "Al A", "bb": "Bob B"},
+        refresh.STATS_FILE: {"Al A": {"active": True, "seasons": ["2023-24"]},
+                             "Bob B": {"active": False, "seasons": ["1999-00"]}},
+        refresh.PLAYED_WITH_FILE: {"Al A": [dict(old_row, name="Bob B")],
+                                   "Bob B": [dict(old_row, name="Al A"), dict(old_row, name="Old O")]},
+        refresh.PLAYED_AGAINST_FILE: {"Al A": [dict(old_row, name="Bob B")], "Bob B": [dict(old_row, name="Al A")]},
+        refresh.OUTPUT_FILE: {"Al A": []},
+    }
+    for file_name, data in datasets.items():
+        with open(os.path.join(directory, file_name), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+
+
+def read(directory: str, file_name: str) -> dict:
+    """Return the JSON object in the named file of directory."""
+    with open(os.path.join(directory, file_name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_only_changed_players_are_fetched(site, tmp_path) -> None:
+    """The active player and the rookie are fetched; the retired player is not."""
+    write_datasets(str(tmp_path))
+    summary = refresh.refresh(str(tmp_path), {"aa": "Al A", "bb": "Bob B", "cc": "Cal C"})
+
+    assert summary == {"refreshed": 2, "rebuilt": 2, "removed": 0}
+    assert not any("bb" in path for path, _, _ in site.requests)
+
+
+def test_rows_are_merged_into_the_datasets(site, tmp_path) -> None:
+    """Fetched rows replace the refreshed players' rows, and everyone else's are kept as they were."""
+    write_datasets(str(tmp_path))
+    refresh.refresh(str(tmp_path), {"aa": "Al A", "bb": "Bob B", "cc": "Cal C"})
+
+    played_with = read(str(tmp_path), refresh.PLAYED_WITH_FILE)
+    assert [entry["name"] for entry in played_with["Al A"]] == ["Bob B", "Cal C"]
+    assert [entry["name"] for entry in played_with["Bob B"]] == ["Al A", "Old O"]
+    assert [entry["name"] for entry in played_with["Cal C"]] == ["Al A"]
+    assert read(str(tmp_path), refresh.PLAYERS_FILE) == {"aa": "Al A", "bb": "Bob B", "cc": "Cal C"}
+    assert read(str(tmp_path), refresh.STATS_FILE)["Cal C"]["active"]
+
+
+def test_connections_are_rebuilt_for_refreshed_players(site, tmp_path) -> None:
+    """The refreshed players' entries of active_players.json are joined from their new rows."""
+    write_datasets(str(tmp_path))
+    refresh.refresh(str(tmp_path), {"aa": "Al A", "bb": "Bob B", "cc": "Cal C"})
+
+    connections = read(str(tmp_path), refresh.OUTPUT_FILE)
+    assert [entry["name"] for entry in connections["Al A"]] == ["Bob B", "Cal C"]
+    assert connections["Al A"][0]["opponent_stats"]["games"] == "8"
+    assert [entry["name"] for entry in connections["Cal C"]] == ["Al A"]
+
+
+def test_failed_fetches_keep_the_old_rows(site, tmp_path) -> None:
+    """A page that cannot be fetched leaves the rows scraped before in place."""
+    site.routes[rows_path("aa", "t")] = (404, {}, b"")
+    write_datasets(str(tmp_path))
+    refresh.refresh(str(tmp_path), {"aa": "Al A", "bb": "Bob B"})
+
+    played_with = read(str(tmp_path), refresh.PLAYED_WITH_FILE)
+    assert [entry["name"] for entry in played_with["Al A"]] == ["Bob B"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
@@ -0,0 +1,145 @@
+"""
+Tests for archive/response_cache.py, run through FetchEngine.fetch_text against a stub HTTP server on localhost.
+"""
+from typing import Callable, Optional
+
+import pytest
+import requests
+
+from archive.fetching import FetchEngine, RetryPolicy
+from archive.response_cache import CacheMissError, ResponseCache
+
+PATH = "/players/j/jamesle01.html"
+
+
+def make_engine(cache: ResponseCache) -> FetchEngine:
+    """Return an engine that fetches through cache without waiting on the rate limit."""
+    return FetchEngine(requests_per_minute=6000, retry=RetryPolicy(max_retries=1), cache=cache)
+
+
+def conditional_route(etag: str, body: bytes,
+                      new_etag: Optional[str] = None) -> Callable[[dict[str, str]], tuple[int, dict[str, str], bytes]]:
+    """
+    Return a route that answers a request with If-None-Match: etag with a 304 (carrying new_etag, if given),
+    and any other request with body.
+    """
+    def respond(headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": new_etag or etag}, b""
+        return 200, {"ETag": etag, "Last-Modified": "Mon, 03 Mar 2025 00:00:00 GMT"}, body
+    return respond
+
+
+def test_miss_then_hit(stub_server, tmp_path) -> None:
+    """The first fetch downloads the page, and the next one is served from disk with no request."""
+    stub_server.routes[PATH] = (200, {}, b"page")
+    cache = ResponseCache(str(tmp_path))
+
+    with make_engine(cache) as engine:
+        assert engine.fetch_text(stub_server.url(PATH)) == "page"
+        assert engine.fetch_text(stub_server.url(PATH)) == "page"
+
+    assert stub_server.count(PATH) == 1
+    assert cache.get_stats() == {"hits": 1, "revalidations": 0, "misses": 1}
+
+
+def test_entries_survive_a_new_cache(stub_server, tmp_path) -> None:
+    """Entries are read back from disk by a cache created later over the same directory."""
+    stub_server.routes[PATH] = (200, {}, b"page")
+    with make_engine(ResponseCache(str(tmp_path))) as engine:
+        engine.fetch_text(stub_server.url(PATH))
+
+    cache = ResponseCache(str(tmp_path))
+    with make_engine(cache) as engine:
+        assert engine.fetch_text(stub_server.url(PATH)) == "page"
+
+    assert stub_server.count(PATH) == 1
+    assert cache.hits == 1
+
+
+def test_expired_entry_is_revalidated_with_a_304(stub_server, tmp_path) -> None:
+    """Once the TTL has passed, a conditional request is sent and a 304 keeps the stored page."""
+    stub_server.routes[PATH] = conditional_route('"v1"', b"page")
+    cache = ResponseCache(str(tmp_path), ttl=0)
+
+    with make_engine(cache) as engine:
+        engine.fetch_text(stub_server.url(PATH))
+        assert engine.fetch_text(stub_server.url(PATH)) == "page"
+
+    _, headers, _ = stub_server.requests[-1]
+    assert headers.get("If-None-Match") == '"v1"'
+    assert headers.get("If-Modified-Since") == "Mon, 03 Mar 2025 00:00:00 GMT"
+    assert cache.get_stats() == {"hits": 0, "revalidations": 1, "misses": 1}
+
+
+def test_304_updates_the_stored_validators(stub_server, tmp_path) -> None:
+    """New validators sent with a 304 are stored and used for the next revalidation."""
+    url = stub_server.url(PATH)
+    stub_server.routes[PATH] = conditional_route('"v1"', b"page", new_etag='"v2"')
+    cache = ResponseCache(str(tmp_path), ttl=0)
+
+    with make_engine(cache) as engine:
+        engine.fetch_text(url)
+        engine.fetch_text(url)
+        assert cache.load(url)["etag"] == '"v2"'
+
+        stub_server.routes[PATH] = conditional_route('"v2"', b"page")
+        assert engine.fetch_text(url) == "page"
+
+    _, headers, _ = stub_server.requests[-1]
+    assert headers.get("If-None-Match") == '"v2"'
+    assert cache.get_stats() == {"hits": 0, "revalidations": 2, "misses": 1}
+
+
+def test_changed_page_replaces_the_stored_body(stub_server, tmp_path) -> None:
+    """A 200 to a conditional request replaces the stored page and its validators."""
+    url = stub_server.url(PATH)
+    stub_server.routes[PATH] = conditional_route('"v1"', b"old page")
+    cache = ResponseCache(str(tmp_path), ttl=0)
+
+    with make_engine(cache) as engine:
+        engine.fetch_text(url)
+        stub_server.routes[PATH] = conditional_route('"v2"', b"new page")
+        assert engine.fetch_text(url) == "new page"
+
+    assert cache.load(url)["text"] == "new page"
+    assert cache.load(url)["etag"] == '"v2"'
+    assert cache.get_stats() == {"hits": 0, "revalidations": 0, "misses": 2}
+
+
+def test_offline_serves_stale_entries(stub_server, tmp_path) -> None:
+    """An offline cache serves stored pages however old they are, without any request."""
+    stub_server.routes[PATH] = (200, {}, b"page")
+    with make_engine(ResponseCache(str(tmp_path))) as engine:
+        engine.fetch_text(stub_server.url(PATH))
+
+    cache = ResponseCache(str(tmp_path), ttl=0, offline=True)
+    with make_engine(cache) as engine:
+        assert engine.fetch_text(stub_server.url(PATH)) == "page"
+
+    assert stub_server.count(PATH) == 1
+    assert cache.hits == 1
+
+
+def test_offline_miss_raises(stub_server, tmp_path) -> None:
+    """An offline cache raises CacheMissError for a page it does not hold, without sending a request."""
+    cache = ResponseCache(str(tmp_path), offline=True)
+
+    with make_engine(cache) as engine, pytest.raises(CacheMissError):
+        engine.fetch_text(stub_server.url(PATH))
+
+    assert stub_server.requests == []
+    assert cache.get_stats() == {"hits": 0, "revalidations": 0, "misses": 0}
+
+
+def test_failed_fetch_is_not_stored(stub_server, tmp_path) -> None:
+    """A page that could not be fetched is not cached, so it is requested again next time."""
+    stub_server.routes[PATH] = [(404, {}, b""), (200, {}, b"page")]
+    cache = ResponseCache(str(tmp_path))
+
+    with make_engine(cache) as engine:
+        with pytest.raises(requests.HTTPError):
+            engine.fetch_text(stub_server.url(PATH))
+        assert engine.fetch_text(stub_server.url(PATH)) == "page"
+
+    assert stub_server.count(PATH) == 2
@@ -1,12 +1,18 @@
 """
 The file that contains the main visualization class.
 """
+import sys
+from typing import Optional
 import pygame
 from classes import Graph
 from display_containers import SideBar, TeamBox, OpponentBox
 from display_objects import PositionalData
+from profiling import PROFILE_TRACE_FILE, profiler
 import asyncio
 
+# How long to sleep waiting for input when nothing on screen needs to be redrawn
+IDLE_TIMEOUT_MS = 250
+
 class Visualization:
     """
     The main class that runs the visualization tool. Maintains references to the original graph structure,
@@ -19,16 +25,17 @@ class Visualization:
     screen: pygame.display
     clock: pygame.time.Clock
     running: bool
+    graph_area: pygame.Rect  # the area covered by the team box and opponent box
 
-    def __init__(self, stats_data: dict, player_connections: dict) -> None:
+    def __init__(self, graph: Graph) -> None:
         """
-        Initialize an instance of the visualization tool.
+        Initialize an instance of the visualization tool for the given player graph.
         """
         pygame.init()
         self.screen = pygame.display.set_mode((1600, 900))
         self.clock = pygame.time.Clock()
         self.running = True
-        self.graph = Graph(stats_data, player_connections)
+        self.graph = graph
         self.teambox = TeamBox(PositionalData(1100, 450, 0, 0), self.screen, self.graph)
         self.sidebar = SideBar(PositionalData(500, 900, 1100, 0), self.screen)
         self.opponentbox = OpponentBox(PositionalData(1100, 450, 0, 450), self.screen, self.graph)
@@ -36,39 +43,136 @@ class Visualization:
         self.sidebar.add_references(self.teambox, self.opponentbox)
         self.opponentbox.add_references(self.sidebar)
         self.sidebar.build_sidebar()
+        self.graph_area = self.teambox.box.union(self.opponentbox.box)
 
-    def check_interactions(self, events: list[pygame.event.Event]) -> None:
+    def check_interactions(self, events: list[pygame.event.Event], point: Optional[tuple[int, int]] = None) -> None:
         """
         Given a list of actions that have happened in the current frame, iterate through all of the player nodes
-        and the UI elements to check if any updates need to occur.
+        and the UI elements to check if any updates need to occur. The mouse position is read once and shared,
+        unless a point is given to use instead.
+        """
+        if point is None:
+            point = pygame.mouse.get_pos()
+        self.sidebar.check_interaction(events, point)
+        self.teambox.check_interaction(events, point)
+        self.opponentbox.check_interaction(events, point)
+
+    def render_elements(self) -> list[pygame.Rect]:
+        """
+        Render the elements on screen that changed since the last frame, and return the areas of the screen that
+        were redrawn. Whether the elements are visible or not is dependent on their internal state.
+
+        The team box and opponent box are always redrawn together, since player nodes and connection lines cross
+        from one box into the other. Drawing is clipped to the redrawn area, so the sidebar still covers anything
+        that overflows the boxes.
+        """
+        dirty_rects = []
+        if self.teambox.dirty or self.opponentbox.dirty:
+            self.screen.set_clip(self.graph_area)
+            self.screen.fill((128, 128, 128))
+            with profiler.section("OpponentBox.render"):
+                self.opponentbox.render()
+            with profiler.section("TeamBox.render"):
+                self.teambox.render()
+            self.screen.set_clip(None)
+            self.teambox.dirty = self.opponentbox.dirty = False
+            dirty_rects.append(self.graph_area)
+
+        if self.sidebar.dirty:
+            with profiler.section("SideBar.render"):
+                self.sidebar.render()
+            self.sidebar.dirty = False
+            dirty_rects.append(self.sidebar.sidebar)
+
+        return dirty_rects
+
+    def mark_dirty(self) -> None:
         """
-        self.sidebar.check_interaction(events)
-        self.teambox.check_interaction(events)
-        self.opponentbox.check_interaction(events)
+        Mark every element as changed, so the whole screen is redrawn on the next frame.
+        """
+        self.teambox.dirty = self.opponentbox.dirty = self.sidebar.dirty = True
+
+    def reload_updated_players(self) -> None:
+        """
+        Rebuild the opponent box and the sidebar metrics if edges of the players they show were added by the
+        background loading since the last frame.
+        """
+        names = self.graph.pop_updated_players()
+        reference_player = self.opponentbox.reference_player
+        if reference_player is not None and reference_player.player_vertex.name in names:
+            self.opponentbox.reload_connections()
+        self.sidebar.reload_metrics(names)
+
+    def get_events(self) -> list[pygame.event.Event]:
+        """
+        Return the events that happened since the last frame. If nothing is waiting to be redrawn, sleep until
+        input arrives instead of spinning at the full frame rate. Sleeping would also stop the graph from loading
+        in the background and the next page of the opponent box from being laid out, so it is skipped until
+        those finish. The browser build cannot block, so it keeps polling (but still skips rendering).
+        """
+        events = pygame.event.get()
+        if events or sys.platform == "emscripten":
+            return events
+        if self.teambox.dirty or self.opponentbox.dirty or self.sidebar.dirty:
+            return events
+        if self.graph.loading:
+            # Keep the frames coming, so the background loading task gets to run between them
+            return events
+        if self.opponentbox.next_page_steps is not None:
+            # Keep the frames coming until the next page of the opponent box is laid out
+            return events
+
+        event = pygame.event.wait(IDLE_TIMEOUT_MS)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
 
-    def render_elements(self) -> None:
+    def run_frame(self, events: list[pygame.event.Event], point: Optional[tuple[int, int]] = None) -> None:
         """
-        Render all of the elements on screen. Whether the elements are visible
-        or not is dependent on their internal state.
+        Handle the events of one frame and redraw what changed. If point is given, it is used as the mouse
+        position instead of the real one (see benchmarks/bench_interaction.py).
         """
-        self.opponentbox.render()
-        self.teambox.render()
-        self.sidebar.render()
+        if profiler.enabled:
+            profiler.start_frame()
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.mark_dirty()
+            elif profiler.enabled and event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.show_overlay = not profiler.show_overlay
+                self.mark_dirty()
+        if self.graph.updated_players:
+            self.reload_updated_players()
+        with profiler.section("check_interactions"):
+            self.check_interactions(events, point)
+        dirty_rects = self.render_elements()
+        idle = not dirty_rects
+        if profiler.enabled:
+            with profiler.section("profiler overlay"):
+                overlay = profiler.render_overlay(self.screen)
+            if overlay is not None:
+                dirty_rects.append(overlay)
+
+        if dirty_rects:
+            with profiler.section("display.update"):
+                pygame.display.update(dirty_rects)
+        if idle:
+            # Nothing changed, so use the spare time to lay out the next page of connections
+            with profiler.section("OpponentBox.prepare_next_page"):
+                self.opponentbox.prepare_next_page()
+        if profiler.enabled:
+            profiler.end_frame()
 
     async def start_visualization(self) -> None:
         """
-        Run the main python visualization tool.
+        Run the main python visualization tool. Only the areas of the screen that changed are redrawn each frame.
         """
         while self.running:
-            events = pygame.event.get()
-            for event in events:
-                if event.type == pygame.QUIT:
-                    self.running = False
-            self.screen.fill((128, 128, 128))
-            self.check_interactions(events)
-            self.render_elements()
-            pygame.display.flip()
+            self.run_frame(self.get_events())
             self.clock.tick(144)
             await asyncio.sleep(0)
+        if profiler.enabled:
+            profiler.export_chrome_trace(PROFILE_TRACE_FILE)
         pygame.quit()
 